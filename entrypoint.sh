@@ -8,4 +8,9 @@ else
   ln -s /app/data/employees.sqlite3 /app/extras/employees.sqlite3
 fi
 
-python launch.py -r
+# Thumbnails are kept on the data volume, nginx sends them from there
+mkdir -p /app/data/thumbnails
+rm -rf /app/static/thumbnails
+ln -s /app/data/thumbnails /app/static/thumbnails
+
+exec gunicorn -c gunicorn.conf.py 'launch:create_app()'
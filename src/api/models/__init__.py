@@ -1,5 +1,8 @@
 from .connector import *
 from .employee import *
+from .delivery import *
+from .lease import *
+from .migrations import *
 
 
 """
@@ -2,14 +2,19 @@ from __future__ import annotations
 
 import builtins
 import sys
+import threading
+import time
 from types import TracebackType
-from typing import Callable, Dict, Optional, Sequence, Type, Union
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple, Type, Union
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 from typing_extensions import Literal
 
+import metrics
 import settings as se
 
 
@@ -21,7 +26,14 @@ import settings as se
 """
 
 
-__all__: Sequence[str] = ('DatabaseConnector',)
+__all__: Sequence[str] = ('DatabaseConnector', 'dispose_engines', 'observe_pools', 'pool_status')
+
+# One pooled engine and session factory per database engine type and
+# access mode (read-only or not), shared by all the requests and scheduler
+# jobs of the process
+_engines: Dict[Tuple[se.DatabaseEngines, bool], Engine] = {}
+_session_factories: Dict[Tuple[se.DatabaseEngines, bool], sessionmaker] = {}
+_engines_lock = threading.Lock()
 
 
 class DatabaseConnector(builtins.object):
@@ -30,7 +42,10 @@ class DatabaseConnector(builtins.object):
     session = property(lambda self: self._session)  # return ScopedSession
 
     def __init__(
-        self, engine_type: se.DatabaseEngines, credentials: Dict[str, Union[int, str]] = {}
+        self,
+        engine_type: se.DatabaseEngines,
+        credentials: Dict[str, Union[int, str]] = {},
+        readonly: bool = False
     ) -> None:
         """Creates SQLAlchemy session object from default.properties config file
         that storage in shared.file_vars object settings.py.
@@ -40,8 +55,13 @@ class DatabaseConnector(builtins.object):
                     posgtresql, etc.) can be taken or supplemented required in the
                     class DatabaseEngines (example: DatabaseEngines.MYSQL.value)
             credentials: Configs from *.properties file
+            readonly: The session only reads. SQLite reads go through the
+                      separate pool of the ``query_only`` connections and
+                      never wait for the writes of the process
         """
         self._enter_to_context = True
+        # Only SQLite has the separate pool for the reads
+        self._engine_key = (engine_type, readonly and engine_type is se.DatabaseEngines.SQLITE)
         # Database connection credentials
         self._db_name = credentials.get('db_name')
         self._engine_type = engine_type
@@ -51,25 +71,18 @@ class DatabaseConnector(builtins.object):
         self._user = credentials.get('db_user')
 
     def __enter__(self) -> DatabaseConnector:
-        suitable_connector: Callable[..., None] = {
-                se.DatabaseEngines.MYSQL:
-                        lambda: create_engine(
-                                    f'{self._engine_type.value}://{self._user}:{self._pwd}@{self._host}:{self._port}/{self._db_name}',
-                                    connect_args={'connect_timeout': se.shared.DB_CONNECT_TIMEOUT}),
-                se.DatabaseEngines.SQLITE:
-                        lambda: create_engine(f'{self._engine_type.value}:///{se.shared.EXTRAS_DIR}/employees.sqlite3')
-        }.get(self._engine_type, lambda: None)
-        # ... and call loader function
-        self._engine = suitable_connector()
         try:
-            # After creating the engine based on the launch mode, try
-            # to connect to the database
+            # Take the shared engine of the launch mode and check out a
+            # connection from its pool (the pool pings it beforehand)
             self._session = None
-            self._engine.connect()
+            self._connection = None
+            started = time.perf_counter()
+            self._engine, session_factory = self._shared_engine()
+            self._connection = self._engine.connect()
             # If the connection is successful - create a session and return it
-            Scoped_Session = \
-                scoped_session(sessionmaker(autoflush=False, bind=self._engine))
-            self._session = Scoped_Session()
+            self._session = session_factory(bind=self._connection)
+            metrics.db_session_acquire.observe(time.perf_counter() - started,
+                                               engine=_engine_name(self._engine_key))
         except SQLAlchemyError:
             if self.__exit__(*sys.exc_info()):
                 self._enter_to_context = False
@@ -85,8 +98,120 @@ class DatabaseConnector(builtins.object):
         try:
             if self._session:
                 self._session.close()
+            if self._connection:
+                self._connection.close()
         except SQLAlchemyError:
             se.logger.error(
                 f'Failure SQLAlchemy: {self._host} : {self._port}', exc_info=True)
         finally:
             return True
+
+    def _shared_engine(self) -> Tuple[Engine, sessionmaker]:
+        # Create the engine only once per engine type and access mode
+        with _engines_lock:
+            engine = _engines.get(self._engine_key)
+            if engine is None:
+                pool_options = {'poolclass': QueuePool,
+                                'pool_size': se.shared.DB_POOL_SIZE,
+                                'max_overflow': se.shared.DB_POOL_MAX_OVERFLOW,
+                                'pool_recycle': se.shared.DB_POOL_RECYCLE,
+                                'pool_pre_ping': True}
+                _, readonly = self._engine_key
+                if self._engine_type is se.DatabaseEngines.SQLITE and not readonly:
+                    # SQLite runs one write at a time anyway, so the writes of
+                    # the process queue up for the single connection here,
+                    # rather than retry on the database lock
+                    pool_options.update({'pool_size': 1,
+                                         'max_overflow': 0,
+                                         'pool_timeout': se.shared.DB_WRITE_TIMEOUT})
+                suitable_connector: Callable[..., Optional[Engine]] = {
+                        se.DatabaseEngines.MYSQL:
+                                lambda: create_engine(
+                                            f'{self._engine_type.value}://{self._user}:{self._pwd}@{self._host}:{self._port}/{self._db_name}',
+                                            connect_args={'connect_timeout': se.shared.DB_CONNECT_TIMEOUT},
+                                            **pool_options),
+                        se.DatabaseEngines.SQLITE:
+                                lambda: create_engine(
+                                            f'{self._engine_type.value}:///{se.shared.EXTRAS_DIR}/employees.sqlite3',
+                                            connect_args={'check_same_thread': False},
+                                            **pool_options)
+                }.get(self._engine_type, lambda: None)
+                # ... and call loader function
+                engine = _engines[self._engine_key] = suitable_connector()
+                if self._engine_type is se.DatabaseEngines.SQLITE:
+                    event.listen(engine, 'connect', _sqlite_pragmas_readonly if readonly else _sqlite_pragmas)
+                _session_factories[self._engine_key] = sessionmaker(autoflush=False)
+            return engine, _session_factories[self._engine_key]
+
+
+def _sqlite_pragmas(dbapi_connection: Any, connection_record: Any) -> None:
+    # WAL lets the reads go on during the write; with WAL the commit is
+    # durable on the checkpoint, so the fsync on every commit is not needed
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f'PRAGMA busy_timeout = {se.shared.DB_BUSY_TIMEOUT * 1000}')
+        cursor.execute('PRAGMA journal_mode = WAL')
+        cursor.execute('PRAGMA synchronous = NORMAL')
+        # The negative cache size is in KiB, not in pages
+        cursor.execute(f'PRAGMA cache_size = -{se.shared.DB_CACHE_BYTES // 1024}')
+        cursor.execute(f'PRAGMA mmap_size = {se.shared.DB_MMAP_BYTES}')
+    finally:
+        cursor.close()
+
+
+def _sqlite_pragmas_readonly(dbapi_connection: Any, connection_record: Any) -> None:
+    _sqlite_pragmas(dbapi_connection, connection_record)
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute('PRAGMA query_only = ON')
+    finally:
+        cursor.close()
+
+
+def _engine_name(engine_key: Tuple[se.DatabaseEngines, bool]) -> str:
+    engine_type, readonly = engine_key
+    return f'{engine_type.name.lower()}{"_readonly" if readonly else ""}'
+
+
+def dispose_engines() -> None:
+    """Closes the pooled connections of all the engines and drops the
+    engines, the next session creates them anew with the current settings.
+    Must be called before the process is forked, so the children never
+    share the connections of the parent.
+    """
+    with _engines_lock:
+        engines = list(_engines.values())
+        _engines.clear()
+        _session_factories.clear()
+    for engine in engines:
+        engine.dispose()
+
+
+def pool_status() -> Dict[str, Dict[str, int]]:
+    """Returns statistics of the connections pools.
+
+    Returns:
+        Pool size, checked in, checked out and overflow connections
+        counts per database engine.
+    """
+    with _engines_lock:
+        engines = dict(_engines)
+    return {_engine_name(engine_key): {'size': engine.pool.size(),
+                                       'checked_in': engine.pool.checkedin(),
+                                       'checked_out': engine.pool.checkedout(),
+                                       # Negative, while the pool is not full
+                                       'overflow': max(0, engine.pool.overflow())}
+            for engine_key, engine in engines.items()}
+
+
+def observe_pools() -> None:
+    """Sets the connections pools gauges (see: ``pool_status``)."""
+    # The engines dropped by ``dispose_engines`` leave the gauges too
+    metrics.db_pool_connections.clear()
+    for engine_name, status in pool_status().items():
+        for state, count in status.items():
+            metrics.db_pool_connections.set(count, engine=engine_name, state=state)
+
+
+# The pools are watched by the metrics scrape
+metrics.registry.on_collect(observe_pools)
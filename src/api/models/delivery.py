@@ -0,0 +1,139 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import Column, DateTime, Integer, String, UniqueConstraint
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.scoping import ScopedSession
+
+import helpers
+
+from .employee import Base
+
+
+"""
+    @author: Jaroslav Kirichok
+    @authors: Delete this text-line if you work with the code below
+              and write your name
+    @license: GNU GENERAL PUBLIC LICENSE 3
+"""
+
+
+__all__: Sequence[str] = ('DeliveryModel', 'DeliveryStatus')
+
+pm = helpers.lazy_import('pendulum')
+
+
+class DeliveryStatus(object):
+    """Delivery statuses of the greeting poster."""
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+
+
+class DeliveryModel(Base):  # type: ignore
+    """Persistent queue of the greeting posters to deliver. There is
+    at most one delivery per employee and greeting day.
+    """
+
+    __tablename__ = 'delivery'
+    __repr_attrs__ = ['employee_id', 'greeting_date', 'status']
+    __table_args__ = (
+        UniqueConstraint('employee_id', 'greeting_date', name='uq_delivery_employee_date'),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+
+    employee_id = Column(Integer, nullable=False)
+    greeting_date = Column(String(10), nullable=False)  # ISO date
+    channel = Column(String(255), nullable=False)
+    poster = Column(String(512), nullable=False, default='')  # path to the cached or copied poster
+    status = Column(String(16), nullable=False, default=DeliveryStatus.PENDING, index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(String(512), nullable=True)
+
+    # In UTC, so the retries never move with the local clock change
+    next_attempt_on = Column(DateTime(), nullable=False)
+    create_on = Column(DateTime(), nullable=False)
+
+    def __init__(self, dbs: ScopedSession) -> None:
+        """Create a new delivery model."""
+        self._dbs = dbs
+
+    def enqueue(self, fields: Dict[str, Any]) -> None:
+        """Put the greeting poster delivery into the queue. The delivery
+        can be put already sent or failed, to keep the record of it.
+        """
+        self.employee_id = fields.get('employee_id')
+        self.greeting_date = fields.get('greeting_date')
+        self.channel = fields.get('channel')
+        self.poster = fields.get('poster', '')
+        self.status = fields.get('status', DeliveryStatus.PENDING)
+        self.attempts = fields.get('attempts', 0)
+        self.last_error = (fields.get('last_error') or '')[:512] or None
+        self.create_on = pm.now('UTC').naive()
+        self.next_attempt_on = fields.get('next_attempt_on', self.create_on)
+        # ... and save her
+        self._dbs.add(self)
+        self._dbs.commit()
+
+    def claim(self, fields: Dict[str, Any]) -> bool:
+        """Put the pending delivery into the queue before the poster is
+        uploaded (see: ``enqueue``), so the delivery is known, whatever
+        happens to the upload.
+
+        Returns:
+            True, if the delivery is put; False, if the poster for the
+            employee and day is in the queue already.
+        """
+        try:
+            self.enqueue(fields)
+        except IntegrityError:
+            self._dbs.rollback()
+            return False
+        return True
+
+    def is_known(self, employee_id: int, greeting_date: str) -> bool:
+        """Check whether the poster for the employee and day is already
+        in the queue, whatever its status is.
+        """
+        return self._dbs.query(DeliveryModel.id) \
+                        .filter_by(employee_id=employee_id, greeting_date=greeting_date) \
+                        .first() is not None
+
+    def get_due(self, moment: Optional[datetime] = None) -> List['DeliveryModel']:
+        """Return pending deliveries whose next attempt time has come."""
+        return self._dbs.query(DeliveryModel) \
+                        .filter(DeliveryModel.status == DeliveryStatus.PENDING,
+                                DeliveryModel.next_attempt_on <= (moment or pm.now('UTC').naive())) \
+                        .order_by(DeliveryModel.id) \
+                        .all()
+
+    def mark_sent(self, id: int) -> None:
+        """Mark the delivery as sent."""
+        delivery = \
+            self._dbs.query(DeliveryModel).filter_by(id=id).one_or_none()
+        if delivery:
+            delivery.status = DeliveryStatus.SENT
+            delivery.attempts += 1
+            delivery.last_error = None
+            self._dbs.commit()
+
+    def mark_failed(
+        self, id: int, error: str, next_attempt_on: Optional[datetime], poster: Optional[str] = None
+    ) -> None:
+        """Record failed attempt. Without the next attempt time the
+        delivery is given up; the poster, if given, replaces the path to
+        the poster to retry.
+        """
+        delivery = \
+            self._dbs.query(DeliveryModel).filter_by(id=id).one_or_none()
+        if delivery:
+            delivery.attempts += 1
+            delivery.last_error = error[:512]
+            if poster:
+                delivery.poster = poster
+            if next_attempt_on is None:
+                delivery.status = DeliveryStatus.FAILED
+            else:
+                delivery.next_attempt_on = next_attempt_on
+            self._dbs.commit()
@@ -1,11 +1,15 @@
-from typing import Any, Dict, Optional, Sequence
+from datetime import date
+from typing import Any, Dict, Iterator, List, Optional, Sequence
 
-from pendulum import now, instance
-from sqlalchemy import Column, DateTime, Integer, MetaData, String
+from sqlalchemy import Column, DateTime, Index, Integer, MetaData, String, false, func, or_
 from sqlalchemy.engine.result import ResultProxy, RowProxy
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm.scoping import ScopedSession
 
+import dates
+import helpers
+import settings as se
+
 
 """
     @author: Jaroslav Kirichok
@@ -17,6 +21,10 @@ from sqlalchemy.orm.scoping import ScopedSession
 
 __all__: Sequence[str] = ('EmployeeModel',)
 
+# Pillow and pendulum are imported, when the employee is written or shown
+imaging = helpers.lazy_import('imaging')
+pm = helpers.lazy_import('pendulum')
+
 # Vars definitions
 _meta = MetaData()
 Base = declarative_base(metadata=_meta)
@@ -27,6 +35,10 @@ class EmployeeModel(Base):  # type: ignore
 
     __tablename__ = 'employee'
     __repr_attrs__ = ['first_name', 'last_name']
+    __table_args__ = (
+        Index('ix_employee_anniversary', 'anniversary_month', 'anniversary_day'),
+        Index('ix_employee_updated_on', 'updated_on'),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
 
@@ -34,8 +46,22 @@ class EmployeeModel(Base):  # type: ignore
     last_name = Column(String(255), nullable=False)
     in_company_from = Column(String(16), nullable=False)
     photography = Column(String(512), nullable=True, default='')
+    # Denormalized from the ``in_company_from`` field for the indexed lookup
+    anniversary_month = Column(Integer, nullable=True)
+    anniversary_day = Column(Integer, nullable=True)
+    # Content hash of the photo, the list thumbnails are named by (see:
+    # ``imaging.save_thumbnails``); empty, if the thumbnails failed
+    photo_digest = Column(String(40), nullable=True)
+    # IANA name of the timezone, the employee is greeted in at the local
+    # time; empty, if the employee is greeted in the scheduler timezone
+    timezone = Column(String(64), nullable=True)
 
     create_on = Column(DateTime(), nullable=False)
+    # Bumped by every write of the row, so the table version changes on the
+    # updates of the other processes as well (see: ``version``); in UTC, so
+    # it never goes back with the clock change
+    updated_on = Column(DateTime(), nullable=True,
+                        default=lambda: pm.now('UTC').naive(), onupdate=lambda: pm.now('UTC').naive())
 
     def __init__(self, dbs: ScopedSession) -> None:
         """Create a new employee model."""
@@ -44,15 +70,31 @@ class EmployeeModel(Base):  # type: ignore
     def create(self, fields: Dict[str, Any]) -> None:
         """Create simple employee."""
         # Filling model
-        self.first_name = fields.get('first_name')
-        self.last_name = fields.get('last_name')
-        self.in_company_from = fields.get('in_company_from')
-        self.photography = fields.get('photography')
-        self.create_on = now()
+        self._fill(fields)
         # ... and save her
         self._dbs.add(self)
         self._dbs.commit()
 
+    def bulk_create(self, rows: Sequence[Dict[str, Any]]) -> List['EmployeeModel']:
+        """Create employees in a single transaction.
+
+        Args:
+            rows: Fields of the employees
+
+        Returns:
+            Created employees.
+        """
+        employees = [EmployeeModel(self._dbs) for _ in rows]
+        for employee, fields in zip(employees, rows):
+            employee._fill(fields)
+        self._dbs.add_all(employees)
+        try:
+            self._dbs.commit()
+        except BaseException:
+            self._dbs.rollback()
+            raise
+        return employees
+
     def delete(self, id: int) -> None:
         """Delete simple employee."""
         employee = \
@@ -61,14 +103,176 @@ class EmployeeModel(Base):  # type: ignore
             self._dbs.delete(employee)
             self._dbs.commit()
 
+    def normalize_dates(self) -> Dict[str, int]:
+        """Rewrites the ``in_company_from`` field of the existing employees
+        in the ISO form (see: ``dates.normalize_date``). Rows are walked
+        through by the primary key and committed in ``FETCH_ROWS`` chunks.
+
+        Returns:
+            Counts of the updated, unchanged and unparsed rows.
+        """
+        report = {'updated': 0, 'unchanged': 0, 'unparsed': 0}
+        last_id = 0
+        while True:
+            employees = self.get_employees_page(last_id, se.shared.FETCH_ROWS)
+            if not employees:
+                break
+            for employee in employees:
+                normalized = dates.normalize_date(employee.in_company_from)
+                if normalized is None:
+                    report['unparsed'] += 1
+                elif normalized == employee.in_company_from:
+                    report['unchanged'] += 1
+                else:
+                    employee.in_company_from = normalized
+                    employee.sync_anniversary()
+                    report['updated'] += 1
+            last_id = employees[-1].id
+            self._dbs.commit()
+        return report
+
     def get_employees(self) -> ResultProxy:
         """Return all employees."""
         return self._dbs.query(EmployeeModel).all()
 
+    def get_employees_page(self, after_id: int, limit: int) -> List['EmployeeModel']:
+        """Return a page of employees ordered by ID (keyset pagination).
+
+        Args:
+            after_id: ID of the last employee on the previous page
+            limit: Page size
+        """
+        return self._dbs.query(EmployeeModel) \
+                        .filter(EmployeeModel.id > after_id) \
+                        .order_by(EmployeeModel.id) \
+                        .limit(limit) \
+                        .all()
+
+    def iter_employees(self, after_id: int = 0) -> Iterator['EmployeeModel']:
+        """Return employees ordered by ID, streamed in ``FETCH_ROWS`` chunks.
+
+        Args:
+            after_id: ID of the employee to start after
+        """
+        return iter(self._dbs.query(EmployeeModel)
+                             .filter(EmployeeModel.id > after_id)
+                             .order_by(EmployeeModel.id)
+                             .yield_per(se.shared.FETCH_ROWS))
+
     def get_employee(self, id: int) -> Optional[RowProxy]:
         """Return simple employee by ID."""
         return self._dbs.query(EmployeeModel).filter_by(id=id).one_or_none()
 
+    def get_without_thumbnails(self, after_id: int, limit: int) -> List['EmployeeModel']:
+        """Return a page of employees with the photo, whose thumbnails are
+        not made yet, ordered by ID.
+
+        Args:
+            after_id: ID of the last employee on the previous page
+            limit: Page size
+        """
+        return self._dbs.query(EmployeeModel) \
+                        .filter(EmployeeModel.photo_digest.is_(None),
+                                EmployeeModel.photography != '',
+                                EmployeeModel.id > after_id) \
+                        .order_by(EmployeeModel.id) \
+                        .limit(limit) \
+                        .all()
+
+    def count_photo_digest(self, digest: str) -> int:
+        """Return count of the employees, whose photo thumbnails are named
+        by the digest (the same photo gives the same thumbnails).
+        """
+        return self._dbs.query(func.count(EmployeeModel.id)) \
+                        .filter(EmployeeModel.photo_digest == digest) \
+                        .scalar()
+
+    def set_photo_digest(self, id: int, digest: str) -> None:
+        """Record the digest of the employee photo thumbnails."""
+        employee = \
+            self._dbs.query(EmployeeModel).filter_by(id=id).one_or_none()
+        if employee:
+            employee.photo_digest = digest
+            self._dbs.commit()
+
+    def get_timezones(self) -> List[str]:
+        """Return the distinct timezones of the employees."""
+        return [timezone for timezone, in
+                self._dbs.query(EmployeeModel.timezone)
+                         .filter(EmployeeModel.timezone.isnot(None))
+                         .distinct()
+                         .order_by(EmployeeModel.timezone)]
+
+    def get_anniversaries(
+        self, day: date, timezones: Optional[Sequence[Optional[str]]] = None
+    ) -> Iterator['EmployeeModel']:
+        """Return employees whose anniversary in the company is on the day.
+        Rows are streamed in ``FETCH_ROWS`` chunks.
+
+        Args:
+            day: Date to search anniversaries for
+            timezones: Timezones of the employees to search, None stands for
+                the employees without the timezone; all employees, if omitted
+
+        Returns:
+            Iterator over employees with anniversary on the day.
+        """
+        days = [day.day]
+        # Employees who came on February 29 are congratulated on February 28
+        # in a non-leap year
+        if (day.month, day.day) == (2, 28) and \
+                (day.year % 4 != 0 or (day.year % 100 == 0 and day.year % 400 != 0)):
+            days.append(29)
+        query = self._dbs.query(EmployeeModel) \
+                         .filter(EmployeeModel.anniversary_month == day.month,
+                                 EmployeeModel.anniversary_day.in_(days))
+        if timezones is not None:
+            named = [timezone for timezone in timezones if timezone]
+            query = query.filter(or_(false(),
+                                     *([EmployeeModel.timezone.in_(named)] if named else []),
+                                     *([EmployeeModel.timezone.is_(None)] if None in timezones else [])))
+        return iter(query.order_by(EmployeeModel.id)
+                         .yield_per(se.shared.FETCH_ROWS))
+
+    def in_company_date(self) -> Optional[date]:
+        """Parses the ``in_company_from`` field (see: ``dates.parse_date``).
+
+        Returns:
+            Date when the employee came to the company or None.
+        """
+        return dates.parse_date(self.in_company_from)
+
+    def sync_anniversary(self) -> None:
+        """Fills the anniversary fields from the ``in_company_from`` field."""
+        in_company = self.in_company_date()
+        self.anniversary_month = in_company.month if in_company else None
+        self.anniversary_day = in_company.day if in_company else None
+
+    def version(self) -> str:
+        """Return a cheap version token of the employee table, built from
+        the rows count, the max ID and the last update time. It is read on
+        every call from the primary key and the ``updated_on`` index, so the
+        writes of all the processes are seen at once.
+        """
+        # The thumbnails are recorded by the update of the row, so they are
+        # caught by the last update time as well
+        count, max_id, last_updated_on = \
+            self._dbs.query(func.count(EmployeeModel.id),
+                            func.max(EmployeeModel.id),
+                            func.max(EmployeeModel.updated_on)).one()
+        return f'{count}-{max_id or 0}-{last_updated_on.isoformat() if last_updated_on else 0}'
+
+    def _fill(self, fields: Dict[str, Any]) -> None:
+        self.first_name = fields.get('first_name')
+        self.last_name = fields.get('last_name')
+        # Dates are stored in the ISO form, the invalid ones are kept as is
+        self.in_company_from = \
+            dates.normalize_date(fields.get('in_company_from')) or fields.get('in_company_from')
+        self.photography = fields.get('photography')
+        self.timezone = dates.normalize_timezone(fields.get('timezone'))
+        self.create_on = pm.now()
+        self.sync_anniversary()
+
     def json(self) -> Dict[str, Any]:
         """Converts model to JSON format
 
@@ -80,4 +284,8 @@ class EmployeeModel(Base):  # type: ignore
                 'last_name': self.last_name,
                 'in_company_from': self.in_company_from,
                 'photography': self.photography,
-                'create_on': instance(self.create_on).to_datetime_string()}
+                'timezone': self.timezone,
+                # List thumbnails by format (see: ``imaging.THUMBNAIL_FORMATS``)
+                'thumbnails': {file_ext.lstrip('.'): f'/v1/thumbnails/{self.photo_digest}{file_ext}'
+                               for file_ext in imaging.THUMBNAIL_FORMATS} if self.photo_digest else None,
+                'create_on': pm.instance(self.create_on).to_datetime_string()}
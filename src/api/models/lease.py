@@ -0,0 +1,80 @@
+from datetime import timedelta
+from typing import Sequence
+
+from sqlalchemy import Column, DateTime, String, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.scoping import ScopedSession
+
+import helpers
+
+from .employee import Base
+
+
+"""
+    @author: Jaroslav Kirichok
+    @authors: Delete this text-line if you work with the code below
+              and write your name
+    @license: GNU GENERAL PUBLIC LICENSE 3
+"""
+
+
+__all__: Sequence[str] = ('LeaseModel',)
+
+pm = helpers.lazy_import('pendulum')
+
+
+class LeaseModel(Base):  # type: ignore
+    """Lease lock shared by the processes of the service through the
+    database. The lease is held by one process until it expires, unless
+    the holder renews it.
+    """
+
+    __tablename__ = 'lease'
+    __repr_attrs__ = ['name', 'holder', 'expires_on']
+
+    name = Column(String(64), primary_key=True)
+    holder = Column(String(255), nullable=False)
+    # In UTC, so the lease never looks valid for an extra hour, when the
+    # local clock goes back
+    expires_on = Column(DateTime(), nullable=False)
+
+    def __init__(self, dbs: ScopedSession) -> None:
+        """Create a new lease model."""
+        self._dbs = dbs
+
+    def acquire(self, name: str, holder: str, ttl: int) -> bool:
+        """Takes the lease, if it is free or expired, or renews it, if it
+        is held by the holder already. SQLite runs the writes one by one,
+        so only one of the competing holders gets the lease.
+
+        Args:
+            name: Lease name
+            holder: Unique name of the process
+            ttl: Time to live of the lease (seconds)
+
+        Returns:
+            True, if the lease is held by the holder now.
+        """
+        moment = pm.now('UTC').naive()
+        fields = {'holder': holder, 'expires_on': moment + timedelta(seconds=ttl)}
+        renewed = self._dbs.query(LeaseModel) \
+                           .filter(LeaseModel.name == name,
+                                   or_(LeaseModel.holder == holder, LeaseModel.expires_on < moment)) \
+                           .update(fields, synchronize_session=False)
+        if not renewed:
+            # The lease is taken for the first time, or it is held by
+            # another process, then the insert fails
+            try:
+                self._dbs.execute(LeaseModel.__table__.insert(), {'name': name, **fields})
+            except IntegrityError:
+                self._dbs.rollback()
+                return False
+        self._dbs.commit()
+        return True
+
+    def release(self, name: str, holder: str) -> None:
+        """Releases the lease held by the holder, so another process can
+        take it without waiting for the lease to expire.
+        """
+        self._dbs.query(LeaseModel).filter_by(name=name, holder=holder).delete(synchronize_session=False)
+        self._dbs.commit()
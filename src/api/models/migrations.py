@@ -0,0 +1,110 @@
+from typing import Callable, Sequence, Set
+
+from sqlalchemy import text
+from sqlalchemy.orm.scoping import ScopedSession
+
+import settings as se
+
+from .delivery import DeliveryModel
+from .employee import EmployeeModel
+from .lease import LeaseModel
+
+
+"""
+    @author: Jaroslav Kirichok
+    @authors: Delete this text-line if you work with the code below
+              and write your name
+    @license: GNU GENERAL PUBLIC LICENSE 3
+"""
+
+
+__all__: Sequence[str] = ('migrate',)
+
+
+def migrate(dbs: ScopedSession) -> None:
+    """Brings the database schema up to date with the models. Every
+    migration is idempotent, so it is safe to call on every start.
+
+    Args:
+        dbs: Database session
+    """
+    # The columns go first, the migrations querying the models
+    # select all of them
+    migrations: Sequence[Callable[[ScopedSession], None]] = (
+        _employee_photo_digest,
+        _employee_timezone,
+        _employee_updated_on,
+        _employee_anniversary,
+        _delivery_table,
+        _lease_table,
+    )
+    for migration in migrations:
+        migration(dbs)
+
+
+def _columns(dbs: ScopedSession, table: str) -> Set[str]:
+    return {row[1] for row in dbs.execute(text(f'PRAGMA table_info({table})'))}
+
+
+def _employee_anniversary(dbs: ScopedSession) -> None:
+    # Add the anniversary columns and the index for them
+    columns = _columns(dbs, 'employee')
+    for column in ('anniversary_month', 'anniversary_day'):
+        if column not in columns:
+            dbs.execute(text(f'ALTER TABLE employee ADD COLUMN {column} INTEGER'))
+    dbs.execute(text('CREATE INDEX IF NOT EXISTS ix_employee_anniversary '
+                     'ON employee (anniversary_month, anniversary_day)'))
+    dbs.commit()
+    # ... and fill them for the existing rows in chunks. Rows with unparsed
+    # dates stay empty, so walk through the rows by the primary key
+    last_id = 0
+    while True:
+        employees = dbs.query(EmployeeModel) \
+                       .filter(EmployeeModel.anniversary_month.is_(None),
+                               EmployeeModel.id > last_id) \
+                       .order_by(EmployeeModel.id) \
+                       .limit(se.shared.FETCH_ROWS) \
+                       .all()
+        if not employees:
+            break
+        for employee in employees:
+            employee.sync_anniversary()
+        last_id = employees[-1].id
+        dbs.commit()
+
+
+def _delivery_table(dbs: ScopedSession) -> None:
+    # Create the greeting posters delivery queue
+    DeliveryModel.__table__.create(bind=dbs.connection(), checkfirst=True)
+    dbs.commit()
+
+
+def _lease_table(dbs: ScopedSession) -> None:
+    # Create the lease locks of the leader election
+    LeaseModel.__table__.create(bind=dbs.connection(), checkfirst=True)
+    dbs.commit()
+
+
+def _employee_photo_digest(dbs: ScopedSession) -> None:
+    # Add the digest of the photo thumbnails, the thumbnails of the
+    # existing photos are made in the background
+    if 'photo_digest' not in _columns(dbs, 'employee'):
+        dbs.execute(text('ALTER TABLE employee ADD COLUMN photo_digest VARCHAR(40)'))
+    dbs.commit()
+
+
+def _employee_timezone(dbs: ScopedSession) -> None:
+    # Add the timezone of the employee, the existing employees are greeted
+    # in the scheduler timezone, as before
+    if 'timezone' not in _columns(dbs, 'employee'):
+        dbs.execute(text('ALTER TABLE employee ADD COLUMN timezone VARCHAR(64)'))
+    dbs.commit()
+
+
+def _employee_updated_on(dbs: ScopedSession) -> None:
+    # Add the last update time of the employee, the existing rows get it
+    # on their next update
+    if 'updated_on' not in _columns(dbs, 'employee'):
+        dbs.execute(text('ALTER TABLE employee ADD COLUMN updated_on DATETIME'))
+    dbs.execute(text('CREATE INDEX IF NOT EXISTS ix_employee_updated_on ON employee (updated_on)'))
+    dbs.commit()
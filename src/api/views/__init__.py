@@ -10,5 +10,9 @@ from flask import Blueprint
 
 
 employee_blueprint = Blueprint('employee_blueprint', __name__)
+profiles_blueprint = Blueprint('profiles_blueprint', __name__)
+thumbnails_blueprint = Blueprint('thumbnails_blueprint', __name__)
 
 from .employee import *
+from .profiles import *
+from .thumbnails import *
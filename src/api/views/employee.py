@@ -1,15 +1,25 @@
+import hashlib
+import json
+import time
+import zipfile
+from mimetypes import guess_extension
 from os.path import join, splitext
-from typing import Any, FrozenSet
+from typing import Any, FrozenSet, Iterator, Optional
 from uuid import uuid4
 
-from flask import jsonify, make_response, request
+from flask import g, jsonify, make_response, request, stream_with_context
 from flask.views import MethodView
 from flask.wrappers import Response
 from flask_api import status
 from returns.pipeline import is_successful
 
+import dates
 import helpers
+import importer
+import metrics
 import settings as se
+from profiling import profiler
+from thumbnails import thumbnailer
 
 from ..models.connector import DatabaseConnector
 from ..models.employee import EmployeeModel
@@ -24,49 +34,167 @@ from . import employee_blueprint
 """
 
 
+# Pillow is imported on the first upload
+imaging = helpers.lazy_import('imaging')
+render = helpers.lazy_import('render')
+
+
 class EmployeesView(MethodView):
 
+    @profiler.profiled('employee.fetch')
     def get(self) -> Response:
-        """GET method for get all Employees."""
-        with DatabaseConnector(se.DatabaseEngines.SQLITE) as dbs:
+        """GET method for get Employees.
+
+        Query args:
+            limit: Page size, if passed - employees are returned page by page
+            after_id: ID of the last employee on the previous page
+            stream: If passed - all employees are streamed as the JSON array
+        """
+        after_id = request.args.get('after_id', default=0, type=int)
+        limit = request.args.get('limit', type=int)
+        if limit is not None and not 0 < limit <= se.shared.FETCH_ROWS:
+            return make_response(jsonify(message=f'Limit must be in range 1..{se.shared.FETCH_ROWS}'),
+                                 status.HTTP_400_BAD_REQUEST)
+        with DatabaseConnector(se.DatabaseEngines.SQLITE, readonly=True) as dbs:
             if dbs.enter_to_context:
                 employee_model = EmployeeModel(dbs.session)
-                employees = employee_model.get_employees()
-                return make_response(jsonify(message='All employees',
-                                             payload=[employee.json() for employee in employees]),
-                                     status.HTTP_200_OK)
+                # The ETag is built from the table version and the query args,
+                # so the repeat requests are answered without touching the rows
+                etag = hashlib.sha1(
+                    f'{employee_model.version()}?{request.query_string.decode()}'.encode()).hexdigest()
+                if request.if_none_match.contains(etag):
+                    response = make_response('', status.HTTP_304_NOT_MODIFIED)
+                elif 'stream' in request.args:
+                    response = Response(stream_with_context(self._stream(after_id)),
+                                        status=status.HTTP_200_OK,
+                                        mimetype='application/json')
+                elif limit is None:
+                    employees = employee_model.get_employees()
+                    response = make_response(jsonify(message='All employees',
+                                                     payload=[employee.json() for employee in employees]),
+                                             status.HTTP_200_OK)
+                else:
+                    employees = employee_model.get_employees_page(after_id, limit)
+                    # The client passes the last ID as ``after_id`` for the next page
+                    next_after_id = employees[-1].id if len(employees) == limit else None
+                    response = make_response(jsonify(message='Employees page',
+                                                     payload=[employee.json() for employee in employees],
+                                                     next_after_id=next_after_id),
+                                             status.HTTP_200_OK)
+                # Let the client cache the list, but check it every time
+                response.set_etag(etag)
+                response.headers['Cache-Control'] = 'no-cache'
+                return response
         return make_response(jsonify({}), status.HTTP_204_NO_CONTENT)
 
+    @staticmethod
+    def _stream(after_id: int) -> Iterator[str]:
+        # Write the JSON array piece by piece, so the whole list
+        # never sits in memory
+        yield '{"message": "All employees", "payload": ['
+        with DatabaseConnector(se.DatabaseEngines.SQLITE, readonly=True) as dbs:
+            if dbs.enter_to_context:
+                employee_model = EmployeeModel(dbs.session)
+                for index, employee in enumerate(employee_model.iter_employees(after_id)):
+                    yield f'{"," if index else ""}{json.dumps(employee.json())}'
+        yield ']}'
+
+    @profiler.profiled('employee.create')
     def post(self) -> Response:
         """POST method for create new Employee.
 
+        The employee is accepted in one of the forms:
+            application/json: fields and the base64 photography in the body
+            multipart/form-data: fields in the form, photography as the file
+            image/*: photography as the raw body, fields in the query args
+
         Require fields:
             first_name, last_name, in_company_from, photography
+
+        Optional fields:
+            timezone: IANA timezone name, the employee is greeted in
         """
-        request_data_result = helpers.from_request(request.data)
-        if not is_successful(request_data_result):
-            return make_response(jsonify(message='JSON decode error'),
-                                 status.HTTP_400_BAD_REQUEST)
-        request_data = request_data_result.unwrap()
-        # Check for missing require fields
         fields: FrozenSet[str] = \
             frozenset(('first_name', 'last_name', 'in_company_from', 'photography'))
-        if not helpers.require_fields(request_data, fields):
-            return make_response(jsonify(message='Please, fill out all the require fields'),
-                                 status.HTTP_400_BAD_REQUEST)
-        photography = request_data.get('photography')
-        # Upload file process
-        offset = (se.shared.EMPLOYEE_PHOTO_WIDTH, se.shared.EMPLOYEE_PHOTO_HEIGHT)
-        file_name = \
-            helpers.upload_ib64(join(se.shared.PHOTOS_DIR, f'{uuid4().hex}'), photography, offset)
+        offset = render.photography_slot()
+        if request.mimetype == 'multipart/form-data' or request.mimetype.startswith('image/'):
+            # Binary photography is never decoded from base64 and never read
+            # into memory as the whole
+            if (request.content_length or 0) > se.shared.MAX_UPLOAD_BYTES:
+                return make_response(jsonify(message='Photography is too large'),
+                                     status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+            if request.mimetype.startswith('image/'):
+                request_data = request.args.to_dict()
+                photography_type = request.mimetype
+                photography_result = helpers.spool(request.stream,
+                                                   se.shared.MAX_UPLOAD_BYTES,
+                                                   se.shared.UPLOAD_CHUNK_BYTES)
+                if not is_successful(photography_result):
+                    return make_response(jsonify(message='Photography is too large'),
+                                         status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+                photography = photography_result.unwrap()
+            else:
+                request_data = request.form.to_dict()
+                photography = request.files.get('photography')
+                photography_type = photography and photography.mimetype
+            # The spooled photography is removed, when it is closed, so it is
+            # closed on every way out
+            try:
+                request_data.update({'photography': photography})
+                if not helpers.require_fields(request_data, fields):
+                    return make_response(jsonify(message='Please, fill out all the require fields'),
+                                         status.HTTP_400_BAD_REQUEST)
+                if dates.parse_date(request_data.get('in_company_from')) is None:
+                    return make_response(jsonify(message='In company from is not a valid date'),
+                                         status.HTTP_400_BAD_REQUEST)
+                if request_data.get('timezone') and dates.normalize_timezone(request_data.get('timezone')) is None:
+                    return make_response(jsonify(message='Timezone is not valid'),
+                                         status.HTTP_400_BAD_REQUEST)
+                file_ext = guess_extension(photography_type or '')
+                if file_ext is None or not photography_type.startswith('image/'):
+                    return make_response(jsonify(message='Photography must be an image'),
+                                         status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+                # Upload file process
+                file_name = helpers.upload_image(join(se.shared.PHOTOS_DIR, f'{uuid4().hex}'),
+                                                 photography.stream if hasattr(photography, 'stream')
+                                                 else photography,
+                                                 file_ext, offset)
+            finally:
+                if photography is not None:
+                    photography.close()
+        else:
+            request_data_result = helpers.from_request(request.data)
+            if not is_successful(request_data_result):
+                return make_response(jsonify(message='JSON decode error'),
+                                     status.HTTP_400_BAD_REQUEST)
+            request_data = request_data_result.unwrap()
+            # Check for missing require fields
+            if not helpers.require_fields(request_data, fields):
+                return make_response(jsonify(message='Please, fill out all the require fields'),
+                                     status.HTTP_400_BAD_REQUEST)
+            if dates.parse_date(request_data.get('in_company_from')) is None:
+                return make_response(jsonify(message='In company from is not a valid date'),
+                                     status.HTTP_400_BAD_REQUEST)
+            if request_data.get('timezone') and dates.normalize_timezone(request_data.get('timezone')) is None:
+                return make_response(jsonify(message='Timezone is not valid'),
+                                     status.HTTP_400_BAD_REQUEST)
+            photography = request_data.get('photography')
+            # Upload file process
+            file_name = \
+                helpers.upload_ib64(join(se.shared.PHOTOS_DIR, f'{uuid4().hex}'), photography, offset)
         if is_successful(file_name):
             # If upload file is well, - update new employee fields
             *_, static, photo = join(se.shared.PHOTOS_DIR, file_name.unwrap()).rpartition('/static')
             request_data.update({'photography': f'{static}{photo}'})
+        else:
+            return make_response(jsonify(message='Photography is not a valid image'),
+                                 status.HTTP_400_BAD_REQUEST)
         with DatabaseConnector(se.DatabaseEngines.SQLITE) as dbs:
             if dbs.enter_to_context:
                 employee_model = EmployeeModel(dbs.session)
                 employee_model.create(request_data)
+                # The list thumbnails are made in the background
+                thumbnailer.submit(employee_model.id, employee_model.photography)
                 return make_response(jsonify(message='Employee was added', payload=employee_model.json()),
                                      status.HTTP_200_OK)
         return make_response(jsonify({}), status.HTTP_204_NO_CONTENT)
@@ -83,6 +211,12 @@ class EmployeesView(MethodView):
                 employee = employee_model.get_employee(id)
                 # First clean the user files
                 helpers.remove_file(f'{se.shared.BASE_DIR}{employee.photography}')
+                helpers.remove_file(imaging.render_variant_path(f'{se.shared.BASE_DIR}{employee.photography}'))
+                # The thumbnails are named by the photo content, so they are
+                # shared by the employees with the same photo
+                if employee.photo_digest and employee_model.count_photo_digest(employee.photo_digest) == 1:
+                    for file_ext in imaging.THUMBNAIL_FORMATS:
+                        helpers.remove_file(join(se.shared.THUMBNAILS_DIR, f'{employee.photo_digest}{file_ext}'))
                 # ... and then delete the user
                 employee_model.delete(id)
                 return make_response(jsonify(message='Employee was deleted'),
@@ -90,11 +224,77 @@ class EmployeesView(MethodView):
         return make_response(jsonify({}), status.HTTP_204_NO_CONTENT)
 
 
+class EmployeesImportView(MethodView):
+
+    @profiler.profiled('employee.import')
+    def post(self) -> Response:
+        """POST method for bulk import of Employees.
+
+        Require files:
+            employees: JSONL or CSV file with the first_name, last_name,
+                       in_company_from and photography fields
+
+        Optional files:
+            photos: ZIP archive with photos, named as in the photography field
+        """
+        employees_file = request.files.get('employees')
+        if employees_file is None:
+            return make_response(jsonify(message='Please, attach the employees file'),
+                                 status.HTTP_400_BAD_REQUEST)
+        *_, file_ext = splitext(employees_file.filename or '')
+        file_format = request.form.get('format') or file_ext.lstrip('.').lower()
+        if file_format not in ('jsonl', 'csv'):
+            return make_response(jsonify(message='Employees file must be JSONL or CSV'),
+                                 status.HTTP_400_BAD_REQUEST)
+        rows = importer.read_rows(employees_file.read().decode('utf-8-sig'), file_format)
+        photos_file = request.files.get('photos')
+        try:
+            if photos_file is not None:
+                with zipfile.ZipFile(photos_file.stream) as archive:
+                    report = importer.import_employees(rows, archive)
+            else:
+                report = importer.import_employees(rows)
+        except zipfile.BadZipFile:
+            return make_response(jsonify(message='Photos must be a ZIP archive'),
+                                 status.HTTP_400_BAD_REQUEST)
+        except RuntimeError:
+            return make_response(jsonify({}), status.HTTP_204_NO_CONTENT)
+        return make_response(jsonify(message='Employees were imported', payload=report),
+                             status.HTTP_200_OK)
+
+
+@employee_blueprint.before_request
+def start_request_timer() -> None:
+    g.request_started = time.perf_counter()
+
+
+@employee_blueprint.before_request
+def require_content_length() -> Optional[Response]:
+    # The size of the multipart body is checked by its length, the chunked
+    # body is read by the form parser with no limit
+    if request.mimetype == 'multipart/form-data' and request.content_length is None:
+        return make_response(jsonify(message='Content-Length is required'),
+                             status.HTTP_411_LENGTH_REQUIRED)
+    return None
+
+
+@employee_blueprint.after_request
+def observe_request_latency(response: Response) -> Response:
+    started = g.get('request_started')
+    if started is not None:
+        metrics.request_latency.observe(time.perf_counter() - started,
+                                        endpoint=request.endpoint or '',
+                                        method=request.method,
+                                        status=str(response.status_code))
+    return response
+
+
 # Register routes employees in Blueprint
 routes = {
     '/v1/employee/fetch/': EmployeesView.as_view('employee_fetch'),
     '/v1/employee/create/': EmployeesView.as_view('employee_create'),
-    '/v1/employee/<int:id>/delete/': EmployeesView.as_view('employee_delete')
+    '/v1/employee/<int:id>/delete/': EmployeesView.as_view('employee_delete'),
+    '/v1/employee/import/': EmployeesImportView.as_view('employee_import')
 }
 for rule, view_func in routes.items():
     employee_blueprint.add_url_rule(rule=rule, view_func=view_func)
@@ -0,0 +1,48 @@
+from os.path import isfile, join
+from typing import Optional
+
+from flask import jsonify, make_response, send_from_directory
+from flask.views import MethodView
+from flask.wrappers import Response
+from flask_api import status
+
+from profiling import profiler
+
+from . import profiles_blueprint
+
+
+"""
+    @author: Jaroslav Kirichok
+    @authors: Delete this text-line if you work with the code below
+              and write your name
+    @license: GNU GENERAL PUBLIC LICENSE 3
+"""
+
+
+class ProfilesView(MethodView):
+
+    def get(self, name: Optional[str] = None) -> Response:
+        """GET method for the captured profiles.
+
+        Args:
+            name: Profile file name, if passed - the file is downloaded,
+                  otherwise the profiles are listed
+        """
+        if name is None:
+            return make_response(jsonify(message='Captured profiles',
+                                         enabled=profiler.enabled,
+                                         payload=profiler.profiles()),
+                                 status.HTTP_200_OK)
+        if not isfile(join(profiler.directory, name)):
+            return make_response(jsonify(message='Profile is not found'),
+                                 status.HTTP_404_NOT_FOUND)
+        return send_from_directory(profiler.directory, name, as_attachment=True)
+
+
+# Register routes profiles in Blueprint
+routes = {
+    '/v1/profiles/': ProfilesView.as_view('profiles_list'),
+    '/v1/profiles/<string:name>': ProfilesView.as_view('profiles_download')
+}
+for rule, view_func in routes.items():
+    profiles_blueprint.add_url_rule(rule=rule, view_func=view_func)
@@ -0,0 +1,58 @@
+from mimetypes import guess_type
+from os.path import isfile, join
+
+from flask import jsonify, make_response, request, send_from_directory
+from flask.views import MethodView
+from flask.wrappers import Response
+from flask_api import status
+
+import settings as se
+from thumbnails import thumbnailer
+
+from . import thumbnails_blueprint
+
+
+"""
+    @author: Jaroslav Kirichok
+    @authors: Delete this text-line if you work with the code below
+              and write your name
+    @license: GNU GENERAL PUBLIC LICENSE 3
+"""
+
+
+class ThumbnailsView(MethodView):
+
+    def get(self, name: str) -> Response:
+        """GET method for the employee photo thumbnails. The thumbnail never
+        changes under its name, so the clients cache it for good.
+
+        The file is sent by nginx, if it asks for it the same way as for
+        Rack::Sendfile (``X-Sendfile-Type: X-Accel-Redirect`` and the
+        ``X-Accel-Mapping: <directory>=<internal location>`` headers),
+        otherwise the file is sent with sendfile by the WSGI server.
+
+        Args:
+            name: Thumbnail file name
+        """
+        file_path = join(thumbnailer.directory, name)
+        if not isfile(file_path):
+            return make_response(jsonify(message='Thumbnail is not found'),
+                                 status.HTTP_404_NOT_FOUND)
+        directory, _, location = request.headers.get('X-Accel-Mapping', '').partition('=')
+        if request.headers.get('X-Sendfile-Type') == 'X-Accel-Redirect' and \
+                location and file_path.startswith(directory):
+            response = make_response('', status.HTTP_200_OK)
+            response.headers['X-Accel-Redirect'] = f'{location.rstrip("/")}/{file_path[len(directory):].lstrip("/")}'
+            response.mimetype = guess_type(name)[0] or 'application/octet-stream'
+        else:
+            response = send_from_directory(thumbnailer.directory, name, conditional=True)
+        response.headers['Cache-Control'] = f'public, max-age={se.shared.THUMBNAIL_MAX_AGE}, immutable'
+        return response
+
+
+# Register routes thumbnails in Blueprint
+routes = {
+    '/v1/thumbnails/<string:name>': ThumbnailsView.as_view('thumbnails_download')
+}
+for rule, view_func in routes.items():
+    thumbnails_blueprint.add_url_rule(rule=rule, view_func=view_func)
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from typing import Dict, Optional, Sequence
+
+import settings as se
+from api.models import DatabaseConnector, EmployeeModel, migrate
+
+
+"""
+    @author: Jaroslav Kirichok
+    @authors: Delete this text-line if you work with the code below
+              and write your name
+    @license: GNU GENERAL PUBLIC LICENSE 3
+"""
+
+
+__all__: Sequence[str] = ('backfill_dates',)
+
+
+def backfill_dates() -> Dict[str, int]:
+    """Rewrites the dates of the existing employees in the ISO form (see:
+    ``EmployeeModel.normalize_dates``).
+
+    Returns:
+        Counts of the updated, unchanged and unparsed rows.
+    """
+    report: Optional[Dict[str, int]] = None
+    # The connector swallows the errors, so the report is checked outside
+    with DatabaseConnector(se.DatabaseEngines.SQLITE) as dbs:
+        if dbs.enter_to_context:
+            migrate(dbs.session)
+            report = EmployeeModel(dbs.session).normalize_dates()
+    if report is None:
+        raise RuntimeError('Oops! Something went wrong with the database.')
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='One-off rewrite of the employees dates in the ISO form')
+    parser.parse_args()
+
+    se.setup_logging()
+    report = backfill_dates()
+    sys.stdout.write(f'{json.dumps(report, indent=4)}\n')
+    sys.exit(1 if report['unparsed'] else 0)
@@ -0,0 +1,11 @@
+from .synthetic import *
+from .runner import *
+from .suites import *
+
+
+"""
+    @author: Jaroslav Kirichok
+    @authors: Delete this text-line if you work with the code below
+              and write your name
+    @license: GNU GENERAL PUBLIC LICENSE 3
+"""
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+from typing import Any, Dict
+
+import settings as se
+
+from .runner import compare, load_report, save_report
+from .suites import bench_contention, bench_helpers, bench_queries, bench_render, bench_uploads
+
+
+"""
+    @author: Jaroslav Kirichok
+    @authors: Delete this text-line if you work with the code below
+              and write your name
+    @license: GNU GENERAL PUBLIC LICENSE 3
+"""
+
+
+def main() -> int:
+    """Runs the benchmarks, and compares the results with the baseline.
+    Everything runs offline on the synthetic data in a temporary directory.
+
+    Returns:
+        Exit code: 1 if any benchmark is slower than the baseline allows.
+    """
+    parser = argparse.ArgumentParser(prog='python -m benchmarks',
+                                     description='Benchmarks the render, upload and database hot paths')
+    parser.add_argument('-o', '--output', default='benchmarks.json',
+                        help='JSON file to write the results to')
+    parser.add_argument('-b', '--baseline', help='JSON file with the results to compare with')
+    parser.add_argument('-t', '--threshold', type=float, default=0.1,
+                        help='Allowed slowdown against the baseline, e.g. 0.1 is 10%%')
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='Employees count of the synthetic databases')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs count of every benchmark')
+    parser.add_argument('--readers', type=int, default=4,
+                        help='Reader threads count of the contention benchmark')
+    parser.add_argument('--only', nargs='+', choices=('helpers', 'uploads', 'render', 'queries', 'contention'),
+                        default=('helpers', 'uploads', 'render', 'queries', 'contention'),
+                        help='Benchmark groups to run')
+    args = parser.parse_args()
+
+    # The posters are never written to disk, and nothing is sent to Slack
+    se.shared.KEEP_BUILT_POSTERS = False
+    results: Dict[str, Dict[str, Any]] = {}
+    with tempfile.TemporaryDirectory(prefix='benchmarks-') as work_dir:
+        if 'helpers' in args.only:
+            results.update(bench_helpers(args.repeat))
+        if 'uploads' in args.only:
+            results.update(bench_uploads(work_dir, args.repeat))
+        if 'render' in args.only:
+            results.update(bench_render(work_dir, args.repeat))
+        if 'queries' in args.only:
+            results.update(bench_queries(work_dir, args.rows, args.repeat))
+        if 'contention' in args.only:
+            results.update(bench_contention(work_dir, max(args.rows), args.readers, args.repeat))
+    save_report(args.output, results)
+    for name, result in sorted(results.items()):
+        print(f'{name:<60} {result["median"] * 1000:>12.3f} ms')
+
+    if not args.baseline:
+        return 0
+    comparison = compare(results, load_report(args.baseline), args.threshold)
+    print()
+    for item in comparison:
+        print(f'{item["name"]:<60} {item["ratio"]:>8.2f}x{"  REGRESSION" if item["regression"] else ""}')
+    return 1 if any(item['regression'] for item in comparison) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
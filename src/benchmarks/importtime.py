@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+from os import path
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+
+"""
+    @author: Jaroslav Kirichok
+    @authors: Delete this text-line if you work with the code below
+              and write your name
+    @license: GNU GENERAL PUBLIC LICENSE 3
+"""
+
+
+__all__: Sequence[str] = ('DEFERRED_MODULES', 'ImportTime', 'check_budget', 'measure_imports')
+
+# Heavy modules, which must be imported on the first use only
+DEFERRED_MODULES: Tuple[str, ...] = ('PIL', 'aiohttp', 'apscheduler', 'dateparser', 'pendulum', 'slack')
+
+
+class ImportTime(NamedTuple):
+    """Import time of the module, reported by ``python -X importtime``."""
+    module: str
+    self_us: int  # microseconds
+    cumulative_us: int  # microseconds
+    depth: int  # nesting level, 0 is imported by the measured statement
+
+
+def measure_imports(statement: str = 'import launch', source_dir: str = '') -> List[ImportTime]:
+    """Runs the statement in a fresh interpreter under ``-X importtime``.
+
+    Args:
+        statement: Python statement to measure
+        source_dir: Directory to run the statement in, ``src`` by default
+
+    Returns:
+        Import time of every imported module in the import order.
+    """
+    source_dir = source_dir or path.dirname(path.dirname(path.realpath(__file__)))
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement],
+                               cwd=source_dir,
+                               stdout=subprocess.DEVNULL,
+                               stderr=subprocess.PIPE,
+                               universal_newlines=True,
+                               check=True)
+    imports: List[ImportTime] = []
+    for line in completed.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, module = line[len('import time:'):].split('|')
+        imports.append(ImportTime(module.strip(),
+                                  int(self_us),
+                                  int(cumulative_us),
+                                  (len(module) - len(module.lstrip()) - 1) // 2))
+    return imports
+
+
+def check_budget(imports: Sequence[ImportTime], budget: float) -> List[str]:
+    """Checks the import time against the budget.
+
+    Args:
+        imports: Import times (see: ``measure_imports``)
+        budget: Allowed import time (seconds)
+
+    Returns:
+        Violations, empty if the budget is kept.
+    """
+    violations: List[str] = []
+    total = sum(item.cumulative_us for item in imports if item.depth == 0) / 1e6
+    if total > budget:
+        violations.append(f'Import takes {total:.3f} s, the budget is {budget:.3f} s')
+    imported = {item.module.partition('.')[0] for item in imports}
+    for module in DEFERRED_MODULES:
+        if module in imported:
+            violations.append(f'{module} is imported eagerly, it must be imported on the first use')
+    return violations
+
+
+def main() -> int:
+    """Measures the import time of the service entry point, and checks it
+    against the budget.
+
+    Returns:
+        Exit code: 1 if the budget is exceeded.
+    """
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.importtime',
+                                     description='Checks the import time of the service against the budget')
+    parser.add_argument('--budget', type=float, default=1.0, help='Allowed import time (seconds)')
+    parser.add_argument('--statement', default='import launch', help='Python statement to measure')
+    parser.add_argument('--top', type=int, default=15, help='Count of the slowest packages to print')
+    args = parser.parse_args()
+
+    imports = measure_imports(args.statement)
+    # Cumulative time of the top-level packages, the submodules are included
+    packages: Dict[str, int] = {}
+    for item in imports:
+        package = item.module.partition('.')[0]
+        if item.module == package:
+            packages[package] = max(packages.get(package, 0), item.cumulative_us)
+    for package, cumulative_us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f'{package:<40} {cumulative_us / 1000:>10.1f} ms')
+
+    violations = check_budget(imports, args.budget)
+    print()
+    for violation in violations:
+        print(violation)
+    print('FAILED' if violations else 'OK')
+    return 1 if violations else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import json
+import platform
+import statistics
+import time
+from typing import Any, Callable, Dict, List, Sequence
+
+import PIL
+import sqlalchemy
+
+
+"""
+    @author: Jaroslav Kirichok
+    @authors: Delete this text-line if you work with the code below
+              and write your name
+    @license: GNU GENERAL PUBLIC LICENSE 3
+"""
+
+
+__all__: \
+    Sequence[str] = ('compare',
+                     'environment',
+                     'load_report',
+                     'measure',
+                     'save_report')
+
+
+def measure(func: Callable[[], Any], number: int = 1, repeat: int = 5) -> Dict[str, Any]:
+    """Measures the function, like ``timeit`` does: the function is called
+    ``number`` times in a row, and this is repeated ``repeat`` times.
+
+    Args:
+        func: Function without arguments to measure
+        number: Calls count in the single run
+        repeat: Runs count
+
+    Returns:
+        Time of the single call (seconds): min, median and mean over the runs.
+    """
+    # Warm up the caches, the first call is never representative
+    func()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - started) / number)
+    return {'number': number,
+            'repeat': repeat,
+            'min': min(timings),
+            'median': statistics.median(timings),
+            'mean': statistics.mean(timings)}
+
+
+def environment() -> Dict[str, str]:
+    """Versions, the results depend on."""
+    return {'python': platform.python_version(),
+            'platform': platform.platform(),
+            'pillow': PIL.__version__,
+            'sqlalchemy': sqlalchemy.__version__}
+
+
+def compare(
+    results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], threshold: float
+) -> List[Dict[str, Any]]:
+    """Compares the results with the baseline by the median time.
+
+    Args:
+        results: Current results by benchmark name
+        baseline: Baseline results by benchmark name
+        threshold: Allowed slowdown, e.g. 0.1 is 10%
+
+    Returns:
+        Comparison for every benchmark, present in both reports.
+    """
+    comparison = []
+    for name in sorted(results.keys() & baseline.keys()):
+        ratio = results[name]['median'] / baseline[name]['median']
+        comparison.append({'name': name,
+                           'baseline': baseline[name]['median'],
+                           'current': results[name]['median'],
+                           'ratio': ratio,
+                           'regression': ratio > 1 + threshold})
+    return comparison
+
+
+def save_report(file_path: str, results: Dict[str, Dict[str, Any]]) -> None:
+    """Saves the results with the environment to the JSON file."""
+    with open(file_path, 'w') as report_file:
+        json.dump({'environment': environment(), 'results': results},
+                  report_file, indent=2, sort_keys=True)
+
+
+def load_report(file_path: str) -> Dict[str, Dict[str, Any]]:
+    """Loads the results from the JSON file, saved by ``save_report``."""
+    with open(file_path) as report_file:
+        return json.load(report_file)['results']
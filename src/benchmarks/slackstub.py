@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import json
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+from delivery import DeliveryItem, DeliveryResult, SlackDelivery
+
+
+"""
+    @author: Jaroslav Kirichok
+    @authors: Delete this text-line if you work with the code below
+              and write your name
+    @license: GNU GENERAL PUBLIC LICENSE 3
+"""
+
+
+__all__: Sequence[str] = ('SCENARIOS', 'Scenario', 'SlackStub', 'check_delivery')
+
+# Delay requested by the rate limited responses of the stub (seconds)
+RETRY_AFTER = 1
+# Upload attempts of the checked delivery within a single run
+MAX_ATTEMPTS = 3
+
+
+class Scenario(NamedTuple):
+    """Responses of the stub to the uploads of a single poster, and the
+    outcome the delivery must come to.
+    """
+    filename: str
+    responses: Tuple[Tuple[int, Dict[str, str], Dict[str, object]], ...]  # status, headers, body
+    attempts: int  # expected count of the upload attempts
+    result: DeliveryResult  # expected outcome, the error text is not compared
+
+
+_OK = (200, {}, {'ok': True})
+_RATE_LIMITED = (429, {'Retry-After': str(RETRY_AFTER)}, {'ok': False, 'error': 'ratelimited'})
+_SERVER_ERROR = (500, {}, {'ok': False, 'error': 'internal_error'})
+_INVALID_AUTH = (200, {}, {'ok': False, 'error': 'invalid_auth'})
+
+SCENARIOS: Tuple[Scenario, ...] = (
+    Scenario('uploaded.jpg', (_OK,), 1, DeliveryResult(ok=True)),
+    Scenario('rate-limited.jpg', (_RATE_LIMITED, _OK), 2, DeliveryResult(ok=True)),
+    Scenario('server-error.jpg', (_SERVER_ERROR, _SERVER_ERROR, _OK), 3, DeliveryResult(ok=True)),
+    Scenario('unavailable.jpg', (_SERVER_ERROR,) * MAX_ATTEMPTS, MAX_ATTEMPTS,
+             DeliveryResult(ok=False, transient=True)),
+    Scenario('rejected.jpg', (_INVALID_AUTH,), 1, DeliveryResult(ok=False)),
+)
+
+
+class SlackStub(ThreadingHTTPServer):
+    """Local stub of the Slack Web API ``files.upload`` method, that replays
+    the responses of the scenarios, and records the time of every upload
+    attempt by the poster filename.
+    """
+
+    def __init__(self, scenarios: Sequence[Scenario]) -> None:
+        """Creates the stub server, listening to a free local port.
+
+        Args:
+            scenarios: Responses to replay
+        """
+        super().__init__(('127.0.0.1', 0), _StubHandler)
+        self.scenarios = {scenario.filename: scenario for scenario in scenarios}
+        self.attempts: Dict[str, List[float]] = {scenario.filename: [] for scenario in scenarios}
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        """Slack Web API URL of the stub."""
+        return f'http://127.0.0.1:{self.server_address[1]}/api/'
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    server: SlackStub
+
+    def do_POST(self) -> None:
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        found = re.search(rb'name="filename"\r\n\r\n([^\r]+)', body)
+        filename = found.group(1).decode() if found else ''
+        if not self.path.endswith('/files.upload') or filename not in self.server.scenarios:
+            self._respond(404, {}, {'ok': False, 'error': 'unknown_method'})
+            return None
+        with self.server.lock:
+            attempts = self.server.attempts[filename]
+            attempts.append(time.monotonic())
+            responses = self.server.scenarios[filename].responses
+            # The last response is repeated, when the attempts are over
+            self._respond(*responses[min(len(attempts), len(responses)) - 1])
+
+    def _respond(self, status: int, headers: Dict[str, str], body: Dict[str, object]) -> None:
+        content = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(content)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args: object) -> None:
+        # The check reports the outcome, the requests are not logged
+        pass
+
+
+def check_delivery(scenarios: Sequence[Scenario] = SCENARIOS) -> List[str]:
+    """Uploads a poster of every scenario to the stub server concurrently,
+    and checks the retries of the delivery against the expected ones.
+
+    Args:
+        scenarios: Responses to replay and the expected outcomes
+
+    Returns:
+        Violations, empty if the delivery behaves as expected.
+    """
+    stub = SlackStub(scenarios)
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+    try:
+        delivery = SlackDelivery(token='xoxb-stub',
+                                 base_url=stub.base_url,
+                                 concurrency=len(scenarios),
+                                 max_attempts=MAX_ATTEMPTS,
+                                 backoff=0.05,
+                                 backoff_max=0.2,
+                                 timeout=5)
+        results = delivery.deliver([DeliveryItem(channel='#stub', poster=b'poster', filename=scenario.filename)
+                                    for scenario in scenarios])
+    finally:
+        stub.shutdown()
+        stub.server_close()
+
+    violations: List[str] = []
+    for scenario, result in zip(scenarios, results):
+        attempts = stub.attempts[scenario.filename]
+        if len(attempts) != scenario.attempts:
+            violations.append(f'{scenario.filename}: {len(attempts)} attempts, {scenario.attempts} expected')
+        if (result.ok, result.transient) != (scenario.result.ok, scenario.result.transient):
+            violations.append(f'{scenario.filename}: {result} is delivered, {scenario.result} expected')
+        for (status, _, _), previous, current in zip(scenario.responses, attempts, attempts[1:]):
+            # The next attempt waits as long as the rate limited response asks
+            if status == 429 and current - previous < RETRY_AFTER:
+                violations.append(f'{scenario.filename}: retried in {current - previous:.3f} s '
+                                  f'after Retry-After: {RETRY_AFTER}')
+    return violations
+
+
+def main() -> int:
+    """Checks the retries of the Slack delivery against the stub server.
+
+    Returns:
+        Exit code: 1 if the delivery does not behave as expected.
+    """
+    violations = check_delivery()
+    for violation in violations:
+        print(violation)
+    print('FAILED' if violations else 'OK')
+    return 1 if violations else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import shutil
+import threading
+from datetime import date
+from os import makedirs, path
+from typing import Any, Callable, Dict, Sequence, Tuple
+from uuid import uuid4
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import helpers
+import settings as se
+from api.models import DatabaseConnector, dispose_engines
+from api.models.employee import EmployeeModel
+from render import create_greeting_poster, photography_slot, plan_registry
+
+from .runner import measure
+from .synthetic import make_data_url, make_database, make_photo
+
+
+"""
+    @author: Jaroslav Kirichok
+    @authors: Delete this text-line if you work with the code below
+              and write your name
+    @license: GNU GENERAL PUBLIC LICENSE 3
+"""
+
+
+__all__: \
+    Sequence[str] = ('UPLOAD_RESOLUTIONS',
+                     'bench_contention',
+                     'bench_helpers',
+                     'bench_queries',
+                     'bench_render',
+                     'bench_uploads')
+
+# Resolutions of the photos, sent by the UI and by the phone cameras
+UPLOAD_RESOLUTIONS: Sequence[Tuple[int, int]] = ((640, 480), (1920, 1080), (4032, 3024))
+
+
+def bench_helpers(repeat: int) -> Dict[str, Dict[str, Any]]:
+    """Benchmarks the small helpers, called for every request or poster."""
+    fields = frozenset(('first_name', 'last_name', 'in_company_from', 'photography'))
+    request_data = {'first_name': 'Anna', 'last_name': 'Petrova',
+                    'in_company_from': '01.02.2019', 'photography': 'data:image/jpeg;base64,'}
+    return {
+        'helpers.time_interpreter':
+            measure(lambda: [helpers.time_interpreter(year) for year in range(1, 41)], 1000, repeat),
+        'helpers.require_fields':
+            measure(lambda: helpers.require_fields(request_data, fields), 10000, repeat),
+    }
+
+
+def bench_uploads(work_dir: str, repeat: int) -> Dict[str, Dict[str, Any]]:
+    """Benchmarks the photo upload at the several input resolutions.
+
+    Args:
+        work_dir: Directory, the uploaded photos are written to
+        repeat: Runs count
+    """
+    offset = photography_slot()
+    results = {}
+    for width, height in UPLOAD_RESOLUTIONS:
+        data_url = make_data_url((width, height))
+        results[f'helpers.upload_ib64[{width}x{height}]'] = \
+            measure(lambda: helpers.upload_ib64(path.join(work_dir, uuid4().hex), data_url, offset)
+                           .unwrap(), 1, repeat)
+    return results
+
+
+def bench_render(work_dir: str, repeat: int) -> Dict[str, Dict[str, Any]]:
+    """Benchmarks the poster render for every template of ``posters.json``.
+
+    Args:
+        work_dir: Directory, the employee photo is written to
+        repeat: Runs count
+    """
+    photo_name = helpers.upload_image(path.join(work_dir, 'employee'),
+                                      make_photo((1200, 1200)), '.jpg', photography_slot()).unwrap()
+    photography = path.join(work_dir, photo_name)
+    return {
+        f'render.create_greeting_poster[{poster}]':
+            measure(lambda: create_greeting_poster(poster, photography, 'Anna Petrova', 5), 1, repeat)
+        for poster in plan_registry.keys()
+    }
+
+
+def bench_queries(work_dir: str, sizes: Sequence[int], repeat: int) -> Dict[str, Dict[str, Any]]:
+    """Benchmarks the employee queries against the synthetic databases.
+
+    Args:
+        work_dir: Directory, the databases are created in
+        sizes: Employees count of every database
+        repeat: Runs count
+    """
+    day = date(2021, 6, 15)
+    results = {}
+    for size in sizes:
+        file_path = path.join(work_dir, f'employees-{size}.sqlite3')
+        make_database(file_path, size)
+        engine = create_engine(f'sqlite:///{file_path}')
+        dbs = sessionmaker(bind=engine)()
+        employee_model = EmployeeModel(dbs)
+        try:
+            results.update({
+                f'db.get_employee[rows={size}]':
+                    measure(lambda: employee_model.get_employee(size // 2), 100, repeat),
+                f'db.get_employees_page[rows={size}]':
+                    measure(lambda: employee_model.get_employees_page(size // 2, 100), 10, repeat),
+                f'db.get_anniversaries[rows={size}]':
+                    measure(lambda: list(employee_model.get_anniversaries(day)), 10, repeat),
+                f'db.iter_employees[rows={size}]':
+                    measure(lambda: sum(1 for _ in employee_model.iter_employees()), 1, repeat),
+                f'db.get_employees[rows={size}]':
+                    measure(lambda: employee_model.get_employees(), 1, repeat),
+            })
+        finally:
+            dbs.close()
+            engine.dispose()
+    return results
+
+
+def bench_contention(
+    work_dir: str, rows: int, readers: int, repeat: int, reads: int = 50, writes: int = 50
+) -> Dict[str, Dict[str, Any]]:
+    """Benchmarks the concurrent reads and writes: the reader threads page
+    through the employees and look up the anniversaries, like the API and
+    the daily job, while the writer thread creates employees. The plain
+    SQLite engine (rollback journal, one pool for all) is compared with
+    the engines of ``DatabaseConnector`` (WAL, pragmas, the read-only pool
+    and the single writer).
+
+    Args:
+        work_dir: Directory, the databases are created in
+        rows: Employees count of the database
+        readers: Count of the reader threads
+        repeat: Runs count
+        reads: Reads count of every reader thread in the single run
+        writes: Writes count in the single run
+    """
+    day = date(2021, 6, 15)
+    fields = {'first_name': 'John', 'last_name': 'Doe', 'in_company_from': '15.06.2015', 'photography': ''}
+
+    def read(dbs: Any) -> None:
+        employee_model = EmployeeModel(dbs)
+        employee_model.get_employees_page(rows // 2, 100)
+        list(employee_model.get_anniversaries(day))
+
+    def write(dbs: Any) -> None:
+        EmployeeModel(dbs).create(dict(fields))
+
+    def run(read_session: Callable[[Callable[[Any], None]], None],
+            write_session: Callable[[Callable[[Any], None]], None]) -> None:
+        threads = [threading.Thread(target=lambda: [read_session(read) for _ in range(reads)])
+                   for _ in range(readers)]
+        threads.append(threading.Thread(target=lambda: [write_session(write) for _ in range(writes)]))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    # The plain engine, as the connector was before the tuning
+    plain_path = path.join(work_dir, f'contention-{rows}.sqlite3')
+    make_database(plain_path, rows)
+    engine = create_engine(f'sqlite:///{plain_path}', connect_args={'check_same_thread': False})
+    factory = sessionmaker(bind=engine)
+
+    def plain_session(action: Callable[[Any], None]) -> None:
+        dbs = factory()
+        try:
+            action(dbs)
+        finally:
+            dbs.close()
+
+    # The connector opens ``employees.sqlite3`` in the extras directory
+    extras_dir = path.join(work_dir, 'extras')
+    makedirs(extras_dir, exist_ok=True)
+    shutil.copyfile(plain_path, path.join(extras_dir, 'employees.sqlite3'))
+
+    def connector_session(readonly: bool) -> Callable[[Callable[[Any], None]], None]:
+        def session(action: Callable[[Any], None]) -> None:
+            with DatabaseConnector(se.DatabaseEngines.SQLITE, readonly=readonly) as dbs:
+                action(dbs.session)
+        return session
+
+    results: Dict[str, Dict[str, Any]] = {}
+    # The engines are dropped on the way in and out, so the connector opens
+    # the benchmark database here, and the service database after it
+    service_extras_dir = se.shared.EXTRAS_DIR
+    dispose_engines()
+    se.shared.EXTRAS_DIR = extras_dir
+    try:
+        results.update({
+            f'db.contention[engine=plain,readers={readers},rows={rows}]':
+                measure(lambda: run(plain_session, plain_session), 1, repeat),
+            f'db.contention[engine=connector,readers={readers},rows={rows}]':
+                measure(lambda: run(connector_session(True), connector_session(False)), 1, repeat),
+        })
+    finally:
+        engine.dispose()
+        dispose_engines()
+        se.shared.EXTRAS_DIR = service_extras_dir
+    return results
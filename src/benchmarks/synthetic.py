@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import base64
+import random
+from datetime import date, datetime, timedelta
+from io import BytesIO
+from typing import Any, Dict, List, Sequence, Tuple
+
+from PIL import Image
+from sqlalchemy import create_engine
+
+from api.models.employee import Base, EmployeeModel
+
+
+"""
+    @author: Jaroslav Kirichok
+    @authors: Delete this text-line if you work with the code below
+              and write your name
+    @license: GNU GENERAL PUBLIC LICENSE 3
+"""
+
+
+__all__: \
+    Sequence[str] = ('make_data_url',
+                     'make_database',
+                     'make_employee_rows',
+                     'make_photo')
+
+_FIRST_NAMES: Sequence[str] = ('Anna', 'Boris', 'Daria', 'Ivan', 'Maria', 'Oleg', 'Olga', 'Petr')
+_LAST_NAMES: Sequence[str] = ('Ivanov', 'Kirichok', 'Petrova', 'Smirnov', 'Sokolova', 'Volkov')
+
+
+def make_photo(size: Tuple[int, int], file_format: str = 'JPEG') -> bytes:
+    """Makes a noisy photo, noise keeps the encoded size and the decode
+    cost close to the real photos.
+
+    Args:
+        size: Photo size (px)
+        file_format: Pillow format name
+
+    Returns:
+        Encoded photo.
+    """
+    photo_im = Image.merge('RGB', [Image.effect_noise(size, 48) for _ in range(3)])
+    photo_buffer = BytesIO()
+    photo_im.save(photo_buffer, format=file_format)
+    return photo_buffer.getvalue()
+
+
+def make_data_url(size: Tuple[int, int]) -> str:
+    """Makes a photo in the form, the UI sends it to the create endpoint.
+
+    Args:
+        size: Photo size (px)
+    """
+    return f'data:image/jpeg;base64,{base64.b64encode(make_photo(size)).decode()}'
+
+
+def make_employee_rows(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Makes the employee table rows, spread evenly over the calendar.
+
+    Args:
+        count: Rows count
+        seed: Seed of the random generator, the same seed makes the same rows
+
+    Returns:
+        Rows ready for insert.
+    """
+    rnd = random.Random(seed)
+    first_day = date(2000, 1, 1)
+    rows = []
+    for _ in range(count):
+        in_company = first_day + timedelta(days=rnd.randrange(365 * 20))
+        rows.append({'first_name': rnd.choice(_FIRST_NAMES),
+                     'last_name': rnd.choice(_LAST_NAMES),
+                     'in_company_from': in_company.strftime('%d.%m.%Y'),
+                     'photography': f'/static/photos/{rnd.getrandbits(128):032x}.jpg',
+                     'anniversary_month': in_company.month,
+                     'anniversary_day': in_company.day,
+                     'create_on': datetime.combine(in_company, datetime.min.time())})
+    return rows
+
+
+def make_database(file_path: str, count: int, seed: int = 0) -> None:
+    """Makes an SQLite database with the current schema and synthetic
+    employees.
+
+    Args:
+        file_path: Path to the database file
+        count: Employees count
+        seed: Seed of the random generator
+    """
+    engine = create_engine(f'sqlite:///{file_path}')
+    try:
+        Base.metadata.create_all(engine)
+        with engine.begin() as connection:
+            connection.execute(EmployeeModel.__table__.insert(), make_employee_rows(count, seed))
+    finally:
+        engine.dispose()
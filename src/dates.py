@@ -0,0 +1,99 @@
+import functools as ft
+from datetime import date, datetime
+from typing import Optional, Sequence, cast
+
+import helpers
+import settings as se
+
+
+"""
+    @author: Jaroslav Kirichok
+    @authors: Delete this text-line if you work with the code below
+              and write your name
+    @license: GNU GENERAL PUBLIC LICENSE 3
+"""
+
+
+__all__: Sequence[str] = ('DATE_FORMATS', 'normalize_date', 'normalize_timezone', 'parse_date', 'parse_strict')
+
+# Formats of the stored dates: ISO, which is written by the service, and
+# ``DD.MM.YYYY``, which is sent by the UI (see: SelectDate.vue)
+DATE_FORMATS: Sequence[str] = ('%Y-%m-%d', '%d.%m.%Y')
+
+# The date parser loads its locale data for a while, so it is imported on
+# the first legacy date
+dp = helpers.lazy_import('dateparser')
+# ... and pendulum on the first timezone check
+pm = helpers.lazy_import('pendulum')
+
+
+def parse_strict(text: Optional[str]) -> Optional[date]:
+    """Parses the date in one of the ``DATE_FORMATS``.
+
+    Args:
+        text: Date string
+
+    Returns:
+        Parsed date or None, if the string is not in the known formats.
+    """
+    text = (text or '').strip()
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format).date()
+        except ValueError:
+            continue
+    return None
+
+
+@ft.lru_cache(maxsize=se.shared.DATE_CACHE_SIZE)
+def _parse_legacy(text: str) -> Optional[date]:
+    # The day goes first, as in the dates of the UI
+    parsed = dp.parse(text, settings={'DATE_ORDER': 'DMY'})
+    return parsed.date() if parsed else None
+
+
+def parse_date(text: Optional[str]) -> Optional[date]:
+    """Parses the date, the known formats are parsed without the date
+    parser (see: ``parse_strict``), the other ones are left to it.
+
+    Args:
+        text: Date string
+
+    Returns:
+        Parsed date or None.
+    """
+    parsed = parse_strict(text)
+    if parsed is not None or not (text or '').strip():
+        return parsed
+    return _parse_legacy(text.strip())
+
+
+def normalize_date(text: Optional[str]) -> Optional[str]:
+    """Converts the date to the ISO form, the form it is stored in.
+
+    Args:
+        text: Date string
+
+    Returns:
+        Date in the ``YYYY-MM-DD`` form or None, if the date is not valid.
+    """
+    parsed = parse_date(text)
+    return parsed.isoformat() if parsed else None
+
+
+def normalize_timezone(name: Optional[str]) -> Optional[str]:
+    """Checks the timezone name against the timezone database.
+
+    Args:
+        name: IANA timezone name, e.g. ``Europe/Kiev``
+
+    Returns:
+        Timezone name or None, if the name is empty or not known.
+    """
+    name = (name or '').strip()
+    if not name:
+        return None
+    try:
+        return cast(str, pm.timezone(name).name)
+    except ValueError:
+        return None
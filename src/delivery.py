@@ -0,0 +1,334 @@
+from __future__ import annotations
+
+import asyncio
+import builtins
+import functools as ft
+import random
+import time
+from datetime import datetime, timedelta
+from os import path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+from uuid import uuid4
+
+from returns.pipeline import is_successful
+
+import helpers
+import metrics
+import settings as se
+from api.models import DatabaseConnector, DeliveryModel, DeliveryStatus
+
+
+"""
+    @author: Jaroslav Kirichok
+    @authors: Delete this text-line if you work with the code below
+              and write your name
+    @license: GNU GENERAL PUBLIC LICENSE 3
+"""
+
+
+# The Slack client and its HTTP stack are imported on the first upload
+aiohttp = helpers.lazy_import('aiohttp')
+slack = helpers.lazy_import('slack')
+# ... and pendulum on the first delivery
+pm = helpers.lazy_import('pendulum')
+
+
+__all__: Sequence[str] = ('DeliveryItem',
+                          'DeliveryResult',
+                          'SlackDelivery',
+                          'enqueue_posters',
+                          'process_queue',
+                          'send_posters',
+                          'slack_delivery')
+
+
+class DeliveryItem(NamedTuple):
+    """Greeting poster to upload to the Slack channel."""
+    channel: str
+    poster: Union[bytes, str]  # encoded poster or path to the poster file
+    filename: str
+
+
+class DeliveryResult(NamedTuple):
+    """Outcome of the greeting poster upload."""
+    ok: bool
+    error: Optional[str] = None
+    transient: bool = False  # the upload is worth retrying later
+    retry_after: float = 0.0  # delay requested by Slack (seconds)
+
+
+class SlackDelivery(builtins.object):
+    """Uploads greeting posters to Slack concurrently through the async
+    client. Transient failures are retried with exponential backoff, that
+    honours the ``Retry-After`` header of the rate limited responses.
+    """
+
+    def __init__(
+        self,
+        token: str,
+        base_url: Optional[str],
+        concurrency: int,
+        max_attempts: int,
+        backoff: float,
+        backoff_max: float,
+        timeout: int
+    ) -> None:
+        """Creates Slack delivery.
+
+        Args:
+            token: Slack ``xoxb-*`` OAuth Access Token
+            base_url: Slack Web API URL, can point to the local stub server;
+                the default is the Slack Web API
+            concurrency: Count of the simultaneous uploads
+            max_attempts: Count of the upload attempts within a single run
+            backoff: First retry delay (seconds)
+            backoff_max: Max retry delay (seconds)
+            timeout: Upload request timeout (seconds)
+        """
+        self._token = token
+        self._base_url = base_url
+        self._concurrency = concurrency
+        self._max_attempts = max_attempts
+        self._backoff = backoff
+        self._backoff_max = backoff_max
+        self._timeout = timeout
+
+    def deliver(self, items: Sequence[DeliveryItem]) -> List[DeliveryResult]:
+        """Uploads greeting posters, blocking until all of them are done.
+
+        Args:
+            items: Greeting posters to upload
+
+        Returns:
+            Upload results in the order of items.
+        """
+        if not items:
+            return []
+        return asyncio.run(self._deliver(items))
+
+    def backoff_delay(self, attempt: int, retry_after: float = 0.0) -> float:
+        """Returns the delay before the next attempt.
+
+        Args:
+            attempt: Count of the failed attempts
+            retry_after: Delay requested by Slack (seconds)
+        """
+        delay = min(self._backoff_max, self._backoff * 2 ** (attempt - 1))
+        # Jitter spreads the retries of the concurrent uploads
+        return max(retry_after, delay * (1 + random.random() / 10))
+
+    async def _deliver(self, items: Sequence[DeliveryItem]) -> List[DeliveryResult]:
+        # One HTTP session for all uploads of the run, so the connections
+        # are reused
+        semaphore = asyncio.Semaphore(self._concurrency)
+        gate: Dict[str, float] = {'not_before': 0.0}
+        async with aiohttp.ClientSession() as session:
+            client = slack.WebClient(token=self._token,
+                                     base_url=self._base_url or slack.WebClient.BASE_URL,
+                                     timeout=self._timeout,
+                                     run_async=True,
+                                     session=session,
+                                     loop=asyncio.get_event_loop())
+            return list(await asyncio.gather(
+                *(self._upload(client, semaphore, gate, item) for item in items)))
+
+    async def _upload(
+        self,
+        client: slack.WebClient,
+        semaphore: asyncio.Semaphore,
+        gate: Dict[str, float],
+        item: DeliveryItem
+    ) -> DeliveryResult:
+        attempt = 0
+        while True:
+            async with semaphore:
+                # When Slack asks to slow down, all the uploads are waiting
+                await asyncio.sleep(max(0.0, gate['not_before'] - time.monotonic()))
+                result = await self._attempt(client, item)
+            if result.ok or not result.transient:
+                return result
+            attempt += 1
+            if attempt >= self._max_attempts:
+                return result
+            if result.retry_after:
+                gate['not_before'] = max(gate['not_before'], time.monotonic() + result.retry_after)
+            await asyncio.sleep(self.backoff_delay(attempt, result.retry_after))
+
+    @staticmethod
+    async def _attempt(client: slack.WebClient, item: DeliveryItem) -> DeliveryResult:
+        started = time.perf_counter()
+        result = await SlackDelivery._upload_once(client, item)
+        outcome = 'ok' if result.ok else \
+            'rate_limited' if result.retry_after else 'transient' if result.transient else 'failed'
+        metrics.slack_upload_latency.observe(time.perf_counter() - started, outcome=outcome)
+        metrics.slack_uploads.inc(outcome=outcome)
+        return result
+
+    @staticmethod
+    async def _upload_once(client: slack.WebClient, item: DeliveryItem) -> DeliveryResult:
+        try:
+            await client.files_upload(channels=item.channel, file=item.poster, filename=item.filename)
+        except slack.errors.SlackApiError as exc:
+            status_code = exc.response.status_code
+            retry_after = \
+                float(exc.response.headers.get('Retry-After', 1)) if status_code == 429 else 0.0
+            return DeliveryResult(ok=False,
+                                  error=f'''Slack API error: {exc.response.get('error', status_code)}''',
+                                  transient=status_code == 429 or status_code >= 500,
+                                  retry_after=retry_after)
+        except FileNotFoundError:
+            return DeliveryResult(ok=False, error=f'Poster {item.poster!s} is not found')
+        except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as exc:
+            return DeliveryResult(ok=False, error=f'Connection error: {exc}', transient=True)
+        return DeliveryResult(ok=True)
+
+
+def send_posters(channel: str, greeting_date: str, posters: Sequence[Tuple[int, str, bytes]]) -> None:
+    """Uploads freshly rendered greeting posters straight from memory. Every
+    poster is put into the delivery queue as pending before the upload,
+    referring to its file in the poster cache, and is marked sent after it:
+    if the process dies in between, the poster is neither lost nor greeted
+    again by the next run, the retry job picks it up, when its claim expires.
+
+    Args:
+        channel: Slack channel
+        greeting_date: Greeting day in the ISO form
+        posters: Employee ID, path to the cached poster and the encoded poster
+    """
+    # The retry job leaves the deliveries alone, while they are uploaded here
+    deliveries, items = \
+        _claim(channel, greeting_date, posters, pm.now('UTC').naive() + timedelta(minutes=se.shared.SLACK_QUEUE_CLAIM))
+    if items:
+        # Upload out of the database session
+        _record(deliveries, items, slack_delivery().deliver(items))
+
+
+def enqueue_posters(channel: str, greeting_date: str, posters: Sequence[Tuple[int, str, bytes]]) -> None:
+    """Puts greeting posters into the delivery queue without uploading
+    them, the retry job uploads them from the poster cache on its next run.
+
+    Args:
+        channel: Slack channel
+        greeting_date: Greeting day in the ISO form
+        posters: Employee ID, path to the cached poster and the encoded poster
+    """
+    _claim(channel, greeting_date, posters, pm.now('UTC').naive())
+
+
+def _claim(
+    channel: str, greeting_date: str, posters: Sequence[Tuple[int, str, bytes]], next_attempt_on: datetime
+) -> Tuple[List[Tuple[int, int, str]], List[DeliveryItem]]:
+    # Put the posters into the queue as pending
+    deliveries: List[Tuple[int, int, str]] = []
+    items: List[DeliveryItem] = []
+    with DatabaseConnector(se.DatabaseEngines.SQLITE) as dbs:
+        if dbs.enter_to_context:
+            for employee_id, path_to_poster, poster in posters:
+                delivery_model = DeliveryModel(dbs.session)
+                if not delivery_model.claim({'employee_id': employee_id,
+                                             'greeting_date': greeting_date,
+                                             'channel': channel,
+                                             'poster': path_to_poster,
+                                             'status': DeliveryStatus.PENDING,
+                                             'next_attempt_on': next_attempt_on}):
+                    se.logger.warning(f'Poster for employee {employee_id} is in the queue already')
+                    continue
+                deliveries.append((delivery_model.id, delivery_model.attempts, path_to_poster))
+                items.append(DeliveryItem(channel=channel, poster=poster,
+                                          filename=f'{employee_id}-{greeting_date}.jpg'))
+    if len(items) < len(posters):
+        se.logger.error(f'{len(posters) - len(items)} posters of {len(posters)} are not queued')
+    return deliveries, items
+
+
+def process_queue() -> None:
+    """Uploads the due greeting posters from the persistent delivery
+    queue. Posters that failed with a transient error are scheduled for
+    the next attempt, the others are given up.
+    """
+    with DatabaseConnector(se.DatabaseEngines.SQLITE, readonly=True) as dbs:
+        if not dbs.enter_to_context:
+            se.logger.error('Oops! Something went wrong with the database.')
+            return None
+        due = DeliveryModel(dbs.session).get_due()
+        deliveries = [(delivery.id, delivery.attempts, delivery.poster) for delivery in due]
+        items = [DeliveryItem(channel=delivery.channel,
+                              poster=delivery.poster,
+                              filename=f'{delivery.employee_id}-{delivery.greeting_date}.jpg')
+                 for delivery in due]
+    # Upload out of the database session
+    _record(deliveries, items, slack_delivery().deliver(items))
+
+
+def _record(
+    deliveries: Sequence[Tuple[int, int, str]], items: Sequence[DeliveryItem], results: Sequence[DeliveryResult]
+) -> None:
+    # Record the outcome of the uploads: the posters to retry are copied out
+    # of the poster cache, which can evict them, and the copies leave the
+    # disk, when the posters are sent or given up
+    with DatabaseConnector(se.DatabaseEngines.SQLITE) as dbs:
+        if not dbs.enter_to_context:
+            se.logger.error('Oops! Something went wrong with the database.')
+            return None
+        delivery_model = DeliveryModel(dbs.session)
+        for (delivery_id, attempts, path_to_poster), item, result in zip(deliveries, items, results):
+            if result.ok:
+                delivery_model.mark_sent(delivery_id)
+                # ... and clean up the files
+                _discard(path_to_poster)
+                continue
+            next_attempt_on = _next_attempt_on(attempts + 1, result)
+            se.logger.error(f'Delivery {delivery_id} is failed ({result.error}); '
+                            f'{"retry at " + str(next_attempt_on) if next_attempt_on else "given up"}')
+            if next_attempt_on is None:
+                delivery_model.mark_failed(delivery_id, result.error or '', None)
+                _discard(path_to_poster)
+                continue
+            delivery_model.mark_failed(delivery_id, result.error or '', next_attempt_on,
+                                       poster=_spill(path_to_poster, item.poster))
+
+
+def _spill(path_to_poster: str, poster: Union[bytes, str]) -> Optional[str]:
+    # Copy the poster to retry out of the poster cache
+    if path.dirname(path_to_poster) == se.shared.BUILT_POSTERS_DIR:
+        return None
+    if isinstance(poster, str):
+        try:
+            with open(poster, 'rb') as poster_file:
+                poster = poster_file.read()
+        except OSError:
+            return None
+    path_to_copy = path.join(se.shared.BUILT_POSTERS_DIR, f'{uuid4().hex}.jpg')
+    if not is_successful(helpers.upload_file(path_to_copy, poster)):
+        se.logger.error(f'Poster {path_to_poster} is not copied to retry, it is retried from the cache')
+        return None
+    return path_to_copy
+
+
+def _discard(path_to_poster: str) -> None:
+    # Only the copies are removed, the cached posters stay in the cache
+    if path.dirname(path_to_poster) == se.shared.BUILT_POSTERS_DIR:
+        helpers.remove_file(path_to_poster)
+
+
+def _next_attempt_on(attempt: int, result: DeliveryResult) -> Optional[datetime]:
+    # The queue backs off exponentially too, but in minutes
+    if not result.transient or attempt >= se.shared.SLACK_QUEUE_MAX_ATTEMPTS:
+        return None
+    delay = min(se.shared.SLACK_QUEUE_BACKOFF_MAX,
+                se.shared.SLACK_QUEUE_BACKOFF * 2 ** (attempt - 1))
+    return pm.now('UTC').naive() + timedelta(minutes=delay, seconds=result.retry_after)
+
+
+@ft.lru_cache(maxsize=None)
+def slack_delivery() -> SlackDelivery:
+    """Slack delivery of the service, created on the first upload, so the
+    messenger settings are read, when they are needed.
+    """
+    return SlackDelivery(token=se.shared.file_vars.pluck('messenger').get('xoxb'),
+                         base_url=se.shared.file_vars.pluck('messenger').get('api_url'),
+                         concurrency=se.shared.SLACK_CONCURRENCY,
+                         max_attempts=se.shared.SLACK_MAX_ATTEMPTS,
+                         backoff=se.shared.SLACK_BACKOFF,
+                         backoff_max=se.shared.SLACK_BACKOFF_MAX,
+                         timeout=se.shared.SLACK_TIMEOUT)
@@ -0,0 +1,53 @@
+from os import environ
+from typing import Any
+
+import helpers
+import launch
+import metrics
+import settings as se
+
+
+"""
+    @author: Jaroslav Kirichok
+    @authors: Delete this text-line if you work with the code below
+              and write your name
+    @license: GNU GENERAL PUBLIC LICENSE 3
+
+    Production server: gunicorn -c gunicorn.conf.py 'launch:create_app()'
+"""
+
+
+bind = f'{se.shared.HOST}:{se.shared.PORT}'
+# The API is served by all the workers, the scheduler runs in one of them
+# (see: ``launch.start_scheduler``). Every worker loads the whole service,
+# so the workers are counted by the CPU quota of the container, not by
+# the CPUs of the node
+workers = int(environ.get('WEB_CONCURRENCY', helpers.available_cpus() * 2 + 1))
+threads = int(environ.get('WEB_THREADS', 4))
+worker_class = 'gthread'
+# The photos upload and the bulk import are long requests
+timeout = 120
+graceful_timeout = 30
+accesslog = '-'
+errorlog = '-'
+
+
+def on_starting(server: Any) -> None:
+    # The master process brings the database schema up to date once,
+    # before the workers are forked, and drops the metrics of the previous run
+    launch.prepare()
+    metrics.registry.discard_shared(se.shared.METRICS_DIR)
+
+
+def post_worker_init(worker: Any) -> None:
+    # The metrics scrape hits any of the workers, so every worker shares its
+    # metrics, and the scrape adds up the metrics of all of them
+    metrics.registry.share(se.shared.METRICS_DIR, se.shared.METRICS_DUMP_EVERY)
+    # Every worker competes for the leadership of the scheduler
+    launch.start_scheduler()
+
+
+def worker_exit(server: Any, worker: Any) -> None:
+    # ... and gives it up on exit, so another worker takes it over at once
+    launch.stop_scheduler()
+    metrics.registry.dump()
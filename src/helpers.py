@@ -3,14 +3,20 @@ from __future__ import annotations, generators
 import base64
 import errno
 import functools as ft
+import importlib
 import json
+import math
+import os
+import tempfile
 from inspect import currentframe
-from io import BytesIO
 from mimetypes import guess_extension, guess_type
-from os import makedirs, path, remove
+from os import cpu_count, makedirs, path, remove
+from types import ModuleType
 from typing import (
+    IO,
     Any,
     AnyStr,
+    BinaryIO,
     Callable,
     Dict,
     FrozenSet,
@@ -18,10 +24,10 @@ from typing import (
     Sequence,
     Tuple,
     TypeVar,
+    Union,
     cast,
 )
 
-from PIL import Image
 from returns.result import safe
 
 
@@ -34,20 +40,53 @@ from returns.result import safe
 
 
 __all__: \
-    Sequence[str] = ('create_folder',
+    Sequence[str] = ('available_cpus',
+                     'create_folder',
                      'disallow',
                      'from_request',
+                     'lazy_import',
                      'prepare_poster',
                      'remove_file',
                      'require_fields',
+                     'spool',
                      'time_interpretation',
                      'upload_file',
-                     'upload_ib64')
+                     'upload_ib64',
+                     'upload_image')
 
 # Types definitions
 ReturnType = TypeVar('ReturnType')
 
 
+def available_cpus() -> int:
+    """Returns the count of the CPUs, the process may use: the CPU quota
+    of the container (cgroup v2 or v1), if it is set, otherwise the CPUs
+    the process is allowed to run on. The CPUs of the node are not all
+    available to the container in Kubernetes.
+
+    Returns:
+        CPUs count, at least one.
+    """
+    # The CPUs affinity is not known on every platform
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else cpu_count() or 1
+    quota_files = (('/sys/fs/cgroup/cpu.max', None),
+                   ('/sys/fs/cgroup/cpu/cpu.cfs_quota_us', '/sys/fs/cgroup/cpu/cpu.cfs_period_us'))
+    for quota_file, period_file in quota_files:
+        try:
+            with open(quota_file) as fl:
+                quota, _, period = fl.read().strip().partition(' ')
+            if period_file is not None:
+                with open(period_file) as fl:
+                    period = fl.read().strip()
+        except OSError:
+            continue
+        # No quota is ``max`` in cgroup v2 and ``-1`` in cgroup v1
+        if quota not in ('max', '-1') and int(period) > 0:
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+        break
+    return max(1, cpus)
+
+
 def create_folder(folder_path: str) -> None:
     """Function for creating a folder in a given path.
 
@@ -109,6 +148,33 @@ def from_request(request_fields: AnyStr) -> Dict[str, Any]:
     return cast(Dict[str, Any], json.loads(request_fields))
 
 
+class _LazyModule(ModuleType):
+    """Module proxy, importing the module on the first attribute access."""
+
+    def __getattr__(self, name: str) -> Any:
+        # The import system holds the module lock, so the module is
+        # imported only once, even if accessed from several threads
+        return getattr(importlib.import_module(self.__name__), name)
+
+
+def lazy_import(module_name: str) -> ModuleType:
+    """Defers the import of the heavy module until its first use, so it
+    does not slow down the start of the process.
+
+    Args:
+        module_name: Full name of the module to import, e.g. ``slack``
+
+    Returns:
+        Module proxy, use it as the module itself.
+    """
+    return _LazyModule(module_name)
+
+
+# The image helpers read the settings, which use these helpers, and load
+# Pillow, so they are imported on the first upload
+imaging = lazy_import('imaging')
+
+
 @safe
 def remove_file(file_path: str) -> None:
     """Function safety remove file.
@@ -140,6 +206,34 @@ def require_fields(
     return False if len({'', None}.intersection(values_fields)) > 0 else True
 
 
+@safe
+def spool(stream: BinaryIO, max_bytes: int, chunk_bytes: int = 64 * 1024) -> IO[bytes]:
+    """Copies the stream to the temporary file chunk by chunk, so the
+    whole body never sits in memory.
+
+    Args:
+        stream: Stream to copy, e.g. ``request.stream``
+        max_bytes: Size limit of the stream
+        chunk_bytes: Size of the single read
+
+    Returns:
+        Temporary file rewound to the start.
+
+    Raises:
+        OverflowError: If the stream is larger than the size limit.
+    """
+    spooled = tempfile.TemporaryFile()
+    size = 0
+    for chunk in iter(lambda: stream.read(chunk_bytes), b''):
+        size += len(chunk)
+        if size > max_bytes:
+            spooled.close()
+            raise OverflowError(f'Stream is larger than {max_bytes} bytes')
+        spooled.write(chunk)
+    spooled.seek(0)
+    return spooled
+
+
 def time_interpreter(year: int) -> str:
     """The function searches for a suitable suffix for a certain
     number of years.
@@ -186,13 +280,37 @@ def upload_ib64(
     ib64_header, ib64_separator, ib64_body = text.partition(',')
     type, *_ = guess_type(f'{ib64_header}{ib64_separator}')
     file_ext = guess_extension(type)
+    # ... and save image
+    return upload_image(file_name, base64.b64decode(ib64_body.strip()), file_ext, offset).unwrap()
+
+
+@safe
+def upload_image(
+    file_name: str,
+    body: Union[bytes, BinaryIO],
+    file_ext: str,
+    offset: Tuple[int, int] = (0, 0),
+) -> str:
+    """Upload image from raw bytes. Next to the image, saves its
+    render-ready variant (see: ``imaging.render_variant``), so the poster
+    rendering skips per-photo conversion.
+
+    Args:
+        file_name: Named file for write
+        body: Image file body or file object
+        file_ext: Image file extension with leading dot
+        offset: Max size of the image, (0, 0) keeps original size
+
+    Returns:
+        If all good, - return full file name.
+    """
     # Construct full file name
     file_name_full = f'{file_name}{file_ext}'
-    # Save file
-    with Image.open(BytesIO(base64.b64decode(ib64_body.strip()))) as fl:
-        if ft.reduce(lambda width, height: width * height, offset) != 0:
-            fl.thumbnail(offset, resample=Image.LANCZOS)
+    # Decode image shrinking it on the fly
+    with imaging.decode_reduced(body, offset) as fl:
         # Save image
-        fl.save(file_name_full, quality=100, optimize=True)
+        imaging.save_fast(fl, file_name_full)
+        # ... and its variant for the posters
+        imaging.save_fast(imaging.render_variant(fl), imaging.render_variant_path(file_name_full))
     # ... and return full file name
     return file_name_full
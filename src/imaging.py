@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import hashlib
+import warnings
+from io import SEEK_END, BytesIO
+from os import path, replace
+from uuid import uuid4
+from typing import BinaryIO, Sequence, Tuple, Union
+
+from PIL import Image
+
+import settings as se
+
+
+"""
+    @author: Jaroslav Kirichok
+    @authors: Delete this text-line if you work with the code below
+              and write your name
+    @license: GNU GENERAL PUBLIC LICENSE 3
+"""
+
+
+__all__: \
+    Sequence[str] = ('RENDER_VARIANT_SUFFIX',
+                     'THUMBNAIL_FORMATS',
+                     'decode_reduced',
+                     'render_variant',
+                     'render_variant_path',
+                     'save_fast',
+                     'save_thumbnails')
+
+# The render-ready variant of the photo lies next to the photo
+RENDER_VARIANT_SUFFIX = '.render.png'
+# Formats of the list thumbnails of the photo, the preferred one goes first
+THUMBNAIL_FORMATS: Sequence[str] = ('.webp', '.jpg')
+
+def decode_reduced(body: Union[str, bytes, BinaryIO], size: Tuple[int, int]) -> Image.Image:
+    """Decodes an untrusted image, shrinking it to the size as cheap as
+    possible: JPEG is decoded right at the reduced scale (draft mode), the
+    other formats are reduced by an integer factor before the final
+    resampling. The byte and pixel budgets (see: ``MAX_IMAGE_BYTES`` and
+    ``MAX_IMAGE_PIXELS`` settings) are checked by the file size and the
+    image header, before the image is decoded.
+
+    Args:
+        body: Image file path, body or file object
+        size: Max size of the image, (0, 0) keeps original size
+
+    Returns:
+        Decoded image, which fits into the size.
+
+    Raises:
+        ValueError: If the image is over the budgets.
+    """
+    if isinstance(body, str):
+        body_size = path.getsize(body)
+    elif isinstance(body, bytes):
+        body_size = len(body)
+        body = BytesIO(body)
+    else:
+        position = body.tell()
+        body_size = body.seek(0, SEEK_END) - position
+        body.seek(position)
+    if body_size > se.shared.MAX_IMAGE_BYTES:
+        raise ValueError(f'Image is larger than {se.shared.MAX_IMAGE_BYTES} bytes')
+    with warnings.catch_warnings():
+        # Pillow's own guard (see: ``Image.MAX_IMAGE_PIXELS``) is the last
+        # line of defence, the frames over it are never opened
+        warnings.simplefilter('error', Image.DecompressionBombWarning)
+        # Only the header is read here
+        im = Image.open(body)
+        try:
+            width, height = size
+            if width and height:
+                im.draft(im.mode, size)
+            if im.width * im.height > se.shared.MAX_IMAGE_PIXELS:
+                raise ValueError(f'Image is larger than {se.shared.MAX_IMAGE_PIXELS} pixels')
+            im.load()
+        except BaseException:
+            im.close()
+            raise
+    if width and height:
+        factor = min(im.width // width, im.height // height)
+        if factor >= 2:
+            im = im.reduce(factor)
+        im.thumbnail(size, resample=Image.LANCZOS)
+    return im
+
+
+def render_variant(im: Image.Image) -> Image.Image:
+    """Converts a photo to the form, the poster is drawn with: grayscale
+    with the alpha mask.
+
+    Args:
+        im: Employee photo
+    """
+    return im if im.mode == 'LA' else im.convert('LA')
+
+
+def render_variant_path(photo_path: str) -> str:
+    """Returns path to the render-ready variant of the photo.
+
+    Args:
+        photo_path: Path to the employee photo
+    """
+    root, _ = path.splitext(photo_path)
+    return f'{root}{RENDER_VARIANT_SUFFIX}'
+
+
+def save_fast(im: Image.Image, file_path: str) -> None:
+    """Saves an image with the fast encoder settings.
+
+    Args:
+        im: Image to save
+        file_path: Path to save to, the format is taken from the extension
+    """
+    *_, file_ext = path.splitext(file_path)
+    file_format = Image.registered_extensions().get(file_ext.lower())
+    if file_format == 'JPEG':
+        im = im if im.mode in ('L', 'RGB', 'CMYK') else im.convert('RGB')
+        im.save(file_path, format=file_format, quality=90)
+    elif file_format == 'PNG':
+        im.save(file_path, format=file_format, compress_level=1)
+    elif file_format == 'WEBP':
+        im = im if im.mode in ('RGB', 'RGBA') else im.convert('RGBA' if 'A' in im.getbands() else 'RGB')
+        im.save(file_path, format=file_format, quality=80, method=4)
+    else:
+        im.save(file_path, format=file_format)
+
+
+def save_thumbnails(photo_path: str, directory: str, size: Tuple[int, int]) -> str:
+    """Saves the list thumbnails of the photo in all the ``THUMBNAIL_FORMATS``
+    under the hash of the photo content and the thumbnail size, so the
+    thumbnail never changes under its name.
+
+    Args:
+        photo_path: Path to the employee photo
+        directory: Directory to save the thumbnails to
+        size: Max size of the thumbnails
+
+    Returns:
+        Digest, the thumbnails are named by (``<digest><format>``).
+    """
+    digest = hashlib.sha1(f'{size}'.encode())
+    with open(photo_path, 'rb') as fl:
+        for chunk in iter(lambda: fl.read(se.shared.UPLOAD_CHUNK_BYTES), b''):
+            digest.update(chunk)
+    with decode_reduced(photo_path, size) as im:
+        for file_ext in THUMBNAIL_FORMATS:
+            file_path = path.join(directory, f'{digest.hexdigest()}{file_ext}')
+            if path.isfile(file_path):
+                continue
+            # Save under a temporary name, so the thumbnail is never served half-written
+            temporary_path = path.join(directory, f'.{uuid4().hex}{file_ext}')
+            save_fast(im, temporary_path)
+            replace(temporary_path, file_path)
+    return digest.hexdigest()
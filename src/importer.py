@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import io
+import json
+import sys
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from os import path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from uuid import uuid4
+
+from returns.pipeline import is_successful
+
+import dates
+import helpers
+import settings as se
+from api.models import DatabaseConnector, EmployeeModel, migrate
+
+
+"""
+    @author: Jaroslav Kirichok
+    @authors: Delete this text-line if you work with the code below
+              and write your name
+    @license: GNU GENERAL PUBLIC LICENSE 3
+"""
+
+
+__all__: Sequence[str] = ('import_employees', 'read_rows')
+
+# The photos are decoded by Pillow, which is imported on the first photo
+imaging = helpers.lazy_import('imaging')
+render = helpers.lazy_import('render')
+
+# Types definitions
+Row = Tuple[int, Dict[str, Any]]
+
+
+def read_rows(text: str, file_format: str) -> Iterator[Row]:
+    """Reads employees rows from the JSONL or CSV text.
+
+    Args:
+        text: Text of the employees file
+        file_format: Format of the text, ``jsonl`` or ``csv``
+
+    Returns:
+        Iterator over pairs of the row number and the row fields. A row
+        that could not be read has the ``error`` field only.
+
+    Raises:
+        ValueError: If the format is not supported.
+    """
+    if file_format == 'jsonl':
+        for row_no, line in enumerate(text.splitlines(), start=1):
+            if not line.strip():
+                continue
+            fields = helpers.from_request(line)
+            if is_successful(fields) and isinstance(fields.unwrap(), dict):
+                yield row_no, fields.unwrap()
+            else:
+                yield row_no, {'error': 'JSON decode error'}
+    elif file_format == 'csv':
+        for row_no, fields in enumerate(csv.DictReader(io.StringIO(text)), start=1):
+            yield row_no, dict(fields)
+    else:
+        raise ValueError(f'Unsupported employees file format: {file_format}')
+
+
+def import_employees(
+    rows: Iterator[Row], archive: Optional[zipfile.ZipFile] = None
+) -> Dict[str, Any]:
+    """Imports employees: processes their photos in parallel workers and
+    inserts rows in batched transactions.
+
+    Args:
+        rows: Rows from the ``read_rows`` function. The ``photography``
+              field is a file name in the photos archive
+        archive: Photos archive
+
+    Returns:
+        Import report with the count of created employees and the list
+        of failed rows.
+    """
+    failed: List[Dict[str, Any]] = []
+    valid: List[Row] = []
+    fields_pattern = frozenset(('first_name', 'last_name', 'in_company_from'))
+    for row_no, fields in rows:
+        if 'error' in fields:
+            failed.append({'row': row_no, 'error': fields['error']})
+        elif not helpers.require_fields(fields, fields_pattern):
+            failed.append({'row': row_no, 'error': 'Please, fill out all the require fields'})
+        elif dates.parse_date(fields.get('in_company_from')) is None:
+            failed.append({'row': row_no, 'error': 'In company from is not a valid date'})
+        elif fields.get('timezone') and dates.normalize_timezone(fields.get('timezone')) is None:
+            failed.append({'row': row_no, 'error': 'Timezone is not valid'})
+        else:
+            valid.append((row_no, fields))
+    # Photos are decoded and resized in parallel
+    with ThreadPoolExecutor(max_workers=se.shared.IMPORT_WORKERS) as executor:
+        uploaded = list(executor.map(lambda row: _upload_photo(row, archive), valid))
+    ready: List[Row] = []
+    for (row_no, fields), error in zip(valid, uploaded):
+        if error:
+            failed.append({'row': row_no, 'error': error})
+        else:
+            ready.append((row_no, fields))
+    # ... and insert rows batch by batch
+    created = 0
+    with DatabaseConnector(se.DatabaseEngines.SQLITE) as dbs:
+        if not dbs.enter_to_context:
+            raise RuntimeError('Oops! Something went wrong with the database.')
+        employee_model = EmployeeModel(dbs.session)
+        for start in range(0, len(ready), se.shared.FETCH_ROWS):
+            batch = ready[start:start + se.shared.FETCH_ROWS]
+            try:
+                created += len(employee_model.bulk_create([fields for _, fields in batch]))
+            except Exception:
+                # Find the broken rows one by one
+                for row_no, fields in batch:
+                    try:
+                        EmployeeModel(dbs.session).create(fields)
+                        created += 1
+                    except Exception as exc:
+                        dbs.session.rollback()
+                        _remove_photo(fields)
+                        failed.append({'row': row_no, 'error': str(exc).splitlines()[0]})
+    return {'created': created,
+            'failed': sorted(failed, key=lambda report: report['row'])}
+
+
+def _upload_photo(row: Row, archive: Optional[zipfile.ZipFile]) -> Optional[str]:
+    # Save the photo from the archive and put its URL into the row
+    _, fields = row
+    photo_name = fields.get('photography')
+    if not photo_name:
+        fields['photography'] = ''
+        return None
+    if archive is None:
+        return 'Photos archive is missing'
+    try:
+        info = archive.getinfo(photo_name)
+    except KeyError:
+        return f'Photo {photo_name} is not found in the archive'
+    # The photo is checked before it is unpacked into memory, and the read
+    # is capped too, as the size in the archive can lie
+    if info.file_size > se.shared.MAX_IMAGE_BYTES:
+        return f'Photo {photo_name} is larger than {se.shared.MAX_IMAGE_BYTES} bytes'
+    try:
+        with archive.open(info) as photo_file:
+            body = photo_file.read(se.shared.MAX_IMAGE_BYTES + 1)
+    except (zipfile.BadZipFile, OSError) as exc:
+        return f'Photo {photo_name} is not unpacked: {exc}'
+    if len(body) > se.shared.MAX_IMAGE_BYTES:
+        return f'Photo {photo_name} is larger than {se.shared.MAX_IMAGE_BYTES} bytes'
+    *_, file_ext = path.splitext(photo_name)
+    offset = render.photography_slot()
+    file_name = helpers.upload_image(
+        path.join(se.shared.PHOTOS_DIR, uuid4().hex), body, file_ext.lower(), offset)
+    if not is_successful(file_name):
+        return f'Photo {photo_name} is not an image'
+    *_, static, photo = file_name.unwrap().rpartition('/static')
+    fields['photography'] = f'{static}{photo}'
+    return None
+
+
+def _remove_photo(fields: Dict[str, Any]) -> None:
+    if fields.get('photography'):
+        helpers.remove_file(f'''{se.shared.BASE_DIR}{fields['photography']}''')
+        helpers.remove_file(imaging.render_variant_path(f'''{se.shared.BASE_DIR}{fields['photography']}'''))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Bulk import of the employees')
+    parser.add_argument('employees',
+                        help='path to the JSONL or CSV file with employees')
+    parser.add_argument('-p', '--photos',
+                        help='path to the ZIP archive with photos')
+    parser.add_argument('-f', '--format', choices=('jsonl', 'csv'),
+                        help='employees file format, by default taken from the extension')
+    cli_args = parser.parse_args()
+
+    se.setup_logging()
+    with DatabaseConnector(se.DatabaseEngines.SQLITE) as dbs:
+        if dbs.enter_to_context:
+            migrate(dbs.session)
+
+    *_, file_ext = path.splitext(cli_args.employees)
+    with open(cli_args.employees, 'r', encoding='utf-8-sig') as employees_fl:
+        rows = read_rows(employees_fl.read(), cli_args.format or file_ext.lstrip('.').lower())
+        if cli_args.photos:
+            with zipfile.ZipFile(cli_args.photos) as archive:
+                report = import_employees(rows, archive)
+        else:
+            report = import_employees(rows)
+    sys.stdout.write(f'{json.dumps(report, ensure_ascii=False, indent=4)}\n')
+    sys.exit(1 if report['failed'] else 0)
@@ -1,27 +1,32 @@
-from __future__ import with_statement
+from __future__ import annotations, with_statement
 
+import functools as ft
 import os
-import random
 import sys
+import threading
+import time
 from multiprocessing import active_children
-from os import path
-from typing import Any, Callable, Dict, cast
-from uuid import uuid4
-
-import dateparser as dp
-import pendulum as pm
-import slack
-from apscheduler import events
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.cron import CronTrigger
+from typing import TYPE_CHECKING, Callable, List, Optional, Sequence, Tuple, cast
+
 from flask import Flask, Response, request
-from PIL import Image, ImageColor, ImageDraw, ImageFilter, ImageFont
 from returns.result import safe
 
+import delivery
 import helpers
+import metrics
 import settings as se
-from api.models import DatabaseConnector, EmployeeModel
-from api.views import employee_blueprint
+from api.models import DatabaseConnector, DeliveryModel, EmployeeModel, dispose_engines, migrate
+from api.views import employee_blueprint, profiles_blueprint, thumbnails_blueprint
+from leader import LeaderElection
+from profiling import profiler
+from thumbnails import thumbnailer
+
+if TYPE_CHECKING:
+    from apscheduler.events import JobEvent
+    from apscheduler.schedulers.background import BackgroundScheduler
+    from pendulum import Date
+
+    from render import RenderTask
 
 
 """
@@ -32,6 +37,19 @@ from api.views import employee_blueprint
 """
 
 
+# Imported on the first use, only the delivery jobs need it
+slack = helpers.lazy_import('slack')
+# ... and the scheduler is imported, when it is created
+background = helpers.lazy_import('apscheduler.schedulers.background')
+cron = helpers.lazy_import('apscheduler.triggers.cron')
+events = helpers.lazy_import('apscheduler.events')
+interval = helpers.lazy_import('apscheduler.triggers.interval')
+# The render stage loads Pillow, only the scheduler leader needs it, and
+# pendulum is imported on the first job
+render = helpers.lazy_import('render')
+pm = helpers.lazy_import('pendulum')
+
+
 def add_cors_headers(response: Response) -> Response:
     response.headers['Access-Control-Allow-Origin'] = '*'
     if request.method == 'OPTIONS':
@@ -42,143 +60,231 @@ def add_cors_headers(response: Response) -> Response:
     return response
 
 
-def create_greeting_poster(
-    poster: Dict[str, Any], photography: str, name: str, years: int
-) -> str:
-    """The function creates a greeting poster based on the selected poster
-    and employee data.
+def greeting_tasks(
+    day: Date, timezones: Optional[Sequence[Optional[str]]] = None
+) -> Optional[List[Tuple[int, RenderTask]]]:
+    """Collects the employees, whose anniversary is on the day, and who
+    are not congratulated yet.
 
     Args:
-        poster: Random selected poster
-        photography: Path to photography employee
-        name: Name employee
-        years: Years count employee in the company
+        day: Greeting date
+        timezones: Timezones of the employees (see: ``shard_timezones``);
+            all employees, if omitted
 
     Returns:
-        If the poster was successfully created and saved, return the path
-        to the poster.
+        Employee ID and the poster render task for every employee, or None
+        if the database is not available.
     """
-    def draw_text(free_text: str = '', *, item: Dict[str, Any]) -> None:
-        font = ImageFont.truetype(path.join(se.shared.FONTS_DIR, f'''{item.get('font-family')}.ttf'''),
-                                  item.get('font-size'),
-                                  encoding='utf-8')
-        # If the free text is not specified, try to take the text from the template
-        width_font, _ = font.getsize(free_text or item.get('text'))
-        _, height_font = font.getoffset(free_text or item.get('text'))
-        # ... and draw text
-        draw.text(((poster_im_width - width_font) // 2, item.get('y') - height_font),
-                  free_text or item.get('text'),
-                  ImageColor.getrgb(item.get('color')),
-                  font=font)
-
-    # Safety open a poster image
-    with Image.open(path.join(se.shared.POSTERS_DIR, poster.get('image'))) as poster_im:
-        # Get width and height poster image
-        poster_im_width, _ = poster_im.size
-        try:
-            with Image.open(photography) as photography_im:
-                # Get size image for define offset
-                photography_im_width, _ = photography_im.size
-                offset = ((poster_im_width - photography_im_width) // 2,
-                          poster.get('items', {}).get('photography', {}).get('y'))
-                # Convert image to grayscale
-                photography_im_gray = photography_im.convert('LA')
-                poster_im.paste(photography_im_gray, offset, photography_im)
-        except BaseException:
-            se.logger.error(
-                'An error occurred, while opening the photography; Continue without photography')
-        # ... and let's go drawing text
-        draw = ImageDraw.Draw(poster_im)
-        draw_text(free_text=name,
-                  item=poster.get('items', {}).get('name', {}))
-        draw_text(item=poster.get('items', {}).get('congratulations', {}))
-        draw_text(item=poster.get('items', {}).get('summary', {}))
-        draw_text(free_text=str(years),
-                  item=poster.get('items', {}).get('years', {}).get('count', {}))
-        draw_text(free_text=helpers.time_interpreter(years),
-                  item=poster.get('items', {}).get('years', {}).get('below', {}))
-        # Formed file name
-        path_to_poster = path.join(se.shared.BUILT_POSTERS_DIR, f'{uuid4().hex}.jpg')
-        # ... and save image
-        poster_im.save(path_to_poster)
-
-    return path_to_poster or ''
-
-
-def scheduler_job_greeting_persistent() -> None:
+    tasks: List[Tuple[int, RenderTask]] = []
+    with DatabaseConnector(se.DatabaseEngines.SQLITE, readonly=True) as dbs:
+        if dbs.enter_to_context:
+            # Create model and traverse on the employees, whose anniversary
+            # is on the day
+            employee_model = EmployeeModel(dbs.session)
+            delivery_model = DeliveryModel(dbs.session)
+            for employee in employee_model.get_anniversaries(day, timezones):
+                in_company = employee.in_company_date()
+                # Skip the employees, who are already congratulated
+                if in_company is None or \
+                        delivery_model.is_known(employee.id, day.isoformat()):
+                    continue
+                # The anniversary is on the day (or on February 28 for the
+                # employees, who came on February 29), so the years are
+                # counted by the calendar years, not by the elapsed time
+                years = day.year - in_company.year
+                # The poster is chosen by the employee and the date, so the
+                # pre-rendered poster and the delivered one are the same
+                tasks.append((employee.id,
+                              render.RenderTask(poster=render.plan_registry.choose(f'{employee.id}:{day.isoformat()}'),
+                                                photography=f'{se.shared.BASE_DIR}{employee.photography}',
+                                                name=f'{employee.first_name}\u0020{employee.last_name}',
+                                                years=years)))
+            return tasks
+    se.logger.error('Oops! Something went wrong with the database.')
+    return None
+
+
+def default_timezone() -> str:
+    """Timezone of the scheduler, the employees without the timezone are
+    greeted in.
+    """
+    return cast(str, pm.now().timezone_name)
+
+
+def shard_timezones(timezone: str) -> Sequence[Optional[str]]:
+    """Timezones of the employees, greeted by the shard of the timezone.
+
+    Args:
+        timezone: Timezone of the shard
+    """
+    # The employees without the timezone belong to the default shard
+    return (None, timezone) if timezone == default_timezone() else (timezone,)
+
+
+@profiler.profiled('greeting.prerender')
+def scheduler_job_prerender(timezone: str) -> None:
+    """Renders the greeting posters of the next day in advance (off-peak),
+    so the greeting job only has to upload them from the poster cache.
+
+    Args:
+        timezone: Timezone of the shard
+    """
+    tomorrow = pm.now(timezone).date().add(days=1)
+    tasks = greeting_tasks(tomorrow, shard_timezones(timezone))
+    if tasks is None:
+        return None
+    posters = render.render_cached([task for _, task in tasks])
+    se.logger.info(f'{sum(1 for _, poster in posters if poster)} posters of {len(tasks)} '
+                   f'were pre-rendered for {tomorrow.isoformat()} ({timezone}); cache {render.poster_cache.stats()}')
+
+
+@profiler.profiled('greeting.persistent')
+def scheduler_job_greeting_persistent(timezone: str) -> None:
     """The general function of checking, creating and sending a greeting
     poster in Slack.
+
+    Args:
+        timezone: Timezone of the shard, the employees are greeted in
     """
-    with DatabaseConnector(se.DatabaseEngines.SQLITE) as dbs:
-        if dbs.enter_to_context:
-            # Create model and traverse on all empoloyees
-            employee_model = EmployeeModel(dbs.session)
-            employees = employee_model.get_employees()
-            for employee in employees:
-                # Get in_company_from date field and check it with now date
-                compare_dt = dp.parse(employee.in_company_from)
-                if all([compare_dt.date().day   == pm.now().date().day,
-                        compare_dt.date().month == pm.now().date().month]):
-                    # First, get random poster
-                    posters = se.shared.file_vars.pluck('posters')
-                    single_poster_key = random.choice(list(posters.keys()))
-                    # Then we transfer this poster and some employee data to the function
-                    # of creating a poster
-                    single_poster_obj: \
-                        Dict[str, Any] = posters.get(single_poster_key)
-                    # Some employee personal data
-                    photography = f'{se.shared.BASE_DIR}{employee.photography}'
-                    name = f'{employee.first_name}\u0020{employee.last_name}'
-                    years = pm.now().date().diff(compare_dt.date()).years
-                    # ... and try create greeting poster
-                    path_to_poster = \
-                        create_greeting_poster(single_poster_obj, photography, name, years)
-                    # If the poster is created, - send it to Slack
-                    is_sended: bool = False
-                    if path_to_poster:
-                        # Get target channel
-                        channel = \
-                            se.shared.file_vars.pluck('messenger').get('channel')
-                        # Trying send greeting poster
-                        is_sended = send_a_greeting_poster(f'#{channel}', path_to_poster)
-                    # ... and clean up the files
-                    if is_sended:
-                        helpers.remove_file(path_to_poster)
-        else:
-            se.logger.error('Oops! Something went wrong with the database.')
-
-
-def scheduler_job_run_monitoring(event: events.JobEvent) -> None:
-    """Listener-function that tracks events occurring in the scheduler.
+    today = pm.now(timezone).date()
+    tasks = greeting_tasks(today, shard_timezones(timezone))
+    if tasks is None:
+        return None
+    # Take the pre-rendered posters from the cache; render only those,
+    # whose employee was changed after the pre-render
+    posters = render.render_cached([task for _, task in tasks])
+    se.logger.info(f'{len(tasks)} posters are built for {today.isoformat()} ({timezone}); '
+                   f'cache {render.poster_cache.stats()}')
+    # Get target channel
+    channel = se.shared.file_vars.pluck('messenger').get('channel')
+    # The deliveries refer to the cached posters, so nothing is written to
+    # disk for them, unless an upload has to be retried
+    posters_to_send = [(employee_id, render.poster_cache.locate(key), poster)
+                       for (employee_id, _), (key, poster) in zip(tasks, posters) if poster]
+    # The render takes a while, meanwhile the leadership could pass to
+    # another process, so the posters are left to the retry job of the
+    # leader, which sends them once
+    if leader_election is not None and not leader_election.is_leader:
+        se.logger.error(f'The posters for {today.isoformat()} ({timezone}) are queued for the leader, '
+                        f'the process is not the leader')
+        delivery.enqueue_posters(f'#{channel}', today.isoformat(), posters_to_send)
+        return None
+    # ... and send the created greeting posters to Slack
+    delivery.send_posters(f'#{channel}', today.isoformat(), posters_to_send)
+
+
+def add_greeting_shard(scheduler: BackgroundScheduler, timezone: str) -> None:
+    """Adds the greeting jobs of the timezone shard to the scheduler: the
+    crontab of the settings is run at the local time of the timezone.
 
     Args:
-        event: Event that occurred in the scheduler
+        scheduler: Scheduler to add the jobs to
+        timezone: Timezone of the shard
+    """
+    properties = se.shared.file_vars.pluck('properties')
+    job_id = f'greeting.persistent@{timezone}'
+    scheduler.add_job(timed_job(job_id,
+                                exclusive_job(job_id,
+                                              ft.partial(scheduler_job_greeting_persistent, timezone),
+                                              scheduler.is_busy)),
+                      trigger=cron.CronTrigger.from_crontab(properties.get('run_every'), timezone=timezone),
+                      id=job_id,
+                      name=job_id,
+                      coalesce=True,
+                      max_instances=1,
+                      replace_existing=True)
+    # Pre-render the posters of the next day off-peak, if it is configured
+    if properties.get('prerender_every'):
+        job_id = f'greeting.prerender@{timezone}'
+        scheduler.add_job(timed_job(job_id, ft.partial(scheduler_job_prerender, timezone)),
+                          trigger=cron.CronTrigger.from_crontab(properties.get('prerender_every'), timezone=timezone),
+                          id=job_id,
+                          name=job_id,
+                          coalesce=True,
+                          max_instances=1,
+                          replace_existing=True)
+
+
+def sync_greeting_shards() -> None:
+    """Brings the greeting shards of the scheduler in line with the
+    timezones of the employees: the shards of the new timezones are added,
+    and the shards, which have no employees anymore, are removed.
+    """
+    timezones: Optional[List[str]] = None
+    with DatabaseConnector(se.DatabaseEngines.SQLITE, readonly=True) as dbs:
+        if dbs.enter_to_context:
+            timezones = EmployeeModel(dbs.session).get_timezones()
+    if timezones is None:
+        se.logger.error('Greeting shards are not synced, the database is not available')
+        return None
+    shards = {default_timezone(), *timezones}
+    current = {job.id.partition('@')[2] for job in scheduler.get_jobs() if '@' in job.id}
+    for timezone in sorted(shards - current):
+        se.logger.info(f'Greeting shard {timezone} is added')
+        add_greeting_shard(scheduler, timezone)
+    for timezone in sorted(current - shards):
+        se.logger.info(f'Greeting shard {timezone} is removed')
+        for job in scheduler.get_jobs():
+            if job.id.endswith(f'@{timezone}'):
+                job.remove()
+
+
+def exclusive_job(job_id: str, job: Callable[[], None], lock: threading.Lock) -> Callable[[], None]:
+    """Wraps the scheduler job, so it never overlaps with the jobs holding
+    the same lock: the run is skipped, while the lock is held.
 
-    Returns:
-        Returns response status like True or False
+    Args:
+        job_id: Scheduler job ID
+        job: Scheduler job function
+        lock: Lock shared by the jobs, which must not overlap
     """
-    if 'grabbing.persistent' in event.job_id:
-        suitable_event_job: Callable[..., bool] = {
-            events.EVENT_JOB_EXECUTED:  lambda: scheduler.is_busy or False,
-            events.EVENT_JOB_SUBMITTED: lambda: scheduler.is_busy or True
-        }.get(event.code, lambda: False)
-        # ... and call scheduler jobs state function
-        suitable_event_job()
+    @ft.wraps(job)
+    def wrapper() -> None:
+        if not lock.acquire(blocking=False):
+            se.logger.warning(f'{job_id} is skipped, the previous run is not finished yet')
+            return None
+        try:
+            return job()
+        finally:
+            lock.release()
+    return wrapper
 
 
-def send_a_greeting_poster(channel: str, path_to_poster: str) -> bool:
-    """Function of sending greeting poster to the channel Slack.
+def scheduler_job_metrics(event: JobEvent) -> None:
+    """Listener-function that measures lag and outcome of the scheduler
+    jobs (see: ``metrics``).
 
     Args:
-        channel: Specify Slack channel
-        path_to_poster: Employee generated greeting poster
+        event: Event that occurred in the scheduler
+    """
+    if event.code == events.EVENT_JOB_SUBMITTED:
+        scheduled_run_time, *_ = event.scheduled_run_times
+        metrics.scheduler_job_lag.observe(max(0.0, time.time() - scheduled_run_time.timestamp()),
+                                          job=event.job_id)
+    else:
+        metrics.scheduler_jobs.inc(job=event.job_id,
+                                   outcome='failed' if event.code == events.EVENT_JOB_ERROR else 'ok')
 
-    Returns:
-        Returns response status like True or False
+
+def timed_job(job_id: str, job: Callable[[], None]) -> Callable[[], None]:
+    """Wraps the scheduler job to measure its duration. The duration is
+    measured in the job itself, so the time in the executor queue is
+    not counted.
+
+    Args:
+        job_id: Scheduler job ID
+        job: Scheduler job function
     """
-    response = \
-        slack_client.files_upload(channels=channel, file=path_to_poster)
-    return cast(bool, response.get('ok', False))
+    @ft.wraps(job)
+    def wrapper() -> None:
+        with metrics.scheduler_job_duration.time(job=job_id):
+            return job()
+    return wrapper
+
+
+def metrics_endpoint() -> Response:
+    """Metrics of the process in the Prometheus text format."""
+    return Response(metrics.registry.exposition(), content_type=metrics.CONTENT_TYPE)
 
 
 def send_a_text(channel: str, text: str) -> bool:
@@ -188,45 +294,152 @@ def send_a_text(channel: str, text: str) -> bool:
         channel: Specify Slack channel
         text: Message text to send
     """
+    # Get Slack ``xoxb-*`` OAuth Access Token and create Slack client
+    slack_client = slack.WebClient(token=se.shared.file_vars.pluck('messenger').get('xoxb'))
     response = \
         slack_client.chat_postMessage(channel=channel, text=text)
     return cast(bool, response.get('ok', False))
 
 
-server = Flask(__name__, static_url_path='/static')
-server.after_request(add_cors_headers)
-server.register_blueprint(employee_blueprint)
+def create_app() -> Flask:
+    """Application factory. Importing this module has no side effects:
+    the logging, the profiling and the routes are set up here, and the
+    heavy modules (Slack client, date parser, scheduler) are imported on first use.
+
+    Returns:
+        Flask application with all the routes.
+    """
+    se.setup_logging()
+    profiler.configure(se.shared.file_vars.pluck('properties'))
+    server = Flask(__name__, static_url_path='/static')
+    # The bulk import is the largest request body, the photos are limited
+    # by their views (see: ``MAX_UPLOAD_BYTES``)
+    server.config['MAX_CONTENT_LENGTH'] = se.shared.MAX_IMPORT_BYTES
+    server.after_request(add_cors_headers)
+    server.register_blueprint(employee_blueprint)
+    server.register_blueprint(profiles_blueprint)
+    server.register_blueprint(thumbnails_blueprint)
+    server.add_url_rule('/metrics', view_func=metrics_endpoint)
+    return server
+
+
+def create_scheduler() -> BackgroundScheduler:
+    """Creates the scheduler with the greeting jobs. The scheduler is
+    not started.
+
+    Returns:
+        Background scheduler.
+    """
+    global scheduler
+    scheduler = background.BackgroundScheduler({'apscheduler.executors.default': {
+                                                   'class': 'apscheduler.executors.pool:ThreadPoolExecutor',
+                                                   'max_workers': se.shared.MAX_SCHEDULER_WORKERS},
+                                                # The jobs due, while the workers are busy, or while
+                                                # the leader is elected, wait for them, and are not missed
+                                                'apscheduler.job_defaults.misfire_grace_time':
+                                                    se.shared.SCHEDULER_MISFIRE_GRACE,
+                                                'apscheduler.timezone': default_timezone()})
+    # This variable is needed to indicate whether there was a rescheduling of
+    # the persistent job in the scheduler
+    setattr(scheduler, 'emergency_mode', False)
+    # Held by the jobs sending the posters, so they never overlap
+    setattr(scheduler, 'is_busy', threading.Lock())
+    # Every timezone of the employees has its own greeting jobs, which run
+    # at the local time, so the load is spread across the day. The shards
+    # of the employees timezones are added by ``sync_greeting_shards``
+    add_greeting_shard(scheduler, default_timezone())
+    scheduler.add_job(timed_job('greeting.shards', sync_greeting_shards),
+                      trigger=interval.IntervalTrigger(minutes=se.shared.GREETING_SHARDS_SYNC_EVERY),
+                      id='greeting.shards',
+                      coalesce=True,
+                      max_instances=1)
+    scheduler.add_job(timed_job('delivery.retry',
+                                exclusive_job('delivery.retry', delivery.process_queue, scheduler.is_busy)),
+                      trigger=interval.IntervalTrigger(minutes=se.shared.SLACK_QUEUE_BACKOFF),
+                      id='delivery.retry',
+                      coalesce=True,
+                      max_instances=1)
+    # Make the thumbnails of the photos, missed by the server workers, in
+    # the threads of the thumbnailer
+    scheduler.add_job(timed_job('thumbnails.missing', thumbnailer.sweep),
+                      trigger=interval.IntervalTrigger(minutes=se.shared.THUMBNAIL_SWEEP_EVERY),
+                      id='thumbnails.missing',
+                      coalesce=True,
+                      max_instances=1)
+    scheduler.add_listener(
+        scheduler_job_metrics, events.EVENT_JOB_EXECUTED |
+                               events.EVENT_JOB_ERROR |
+                               events.EVENT_JOB_SUBMITTED)
+    return scheduler
+
+
+def prepare() -> None:
+    """Brings the database schema up to date. Called once, before the
+    server workers are started.
+    """
+    with DatabaseConnector(se.DatabaseEngines.SQLITE) as dbs:
+        if dbs.enter_to_context:
+            migrate(dbs.session)
+    # The forked workers open their own connections
+    dispose_engines()
+
+
+def start_scheduler() -> BackgroundScheduler:
+    """Creates the scheduler and starts it paused. Every process of the
+    service competes for the leadership, and only the leader runs the jobs
+    (see: ``LeaderElection``), so the greetings are sent once, whatever
+    the count of the server workers is.
+
+    Returns:
+        Background scheduler.
+    """
+    global leader_election
+    scheduler = create_scheduler()
+    scheduler.start(paused=True)
+    leader_election = LeaderElection('scheduler',
+                                     se.shared.LEADER_LEASE_TTL,
+                                     on_elected=scheduler_elected,
+                                     on_deposed=scheduler.pause)
+    leader_election.start()
+    # Profiling is toggled by the ``SIGUSR2`` signal at runtime
+    profiler.install_signal()
+    return scheduler
+
+
+def scheduler_elected() -> None:
+    """Resumes the scheduler of the process elected the leader."""
+    # Parse the posters fonts and compile render plans before the first job
+    # run, here and in the render workers, which are kept between the runs
+    render.font_registry.warm(se.shared.file_vars.pluck('posters'))
+    render.plan_registry.warm()
+    render.render_pool.start()
+    sync_greeting_shards()
+    scheduler.resume()
+
+
+def stop_scheduler() -> None:
+    """Stops the scheduler and gives up the leadership."""
+    if leader_election is not None:
+        leader_election.stop()
+    if scheduler is not None:
+        # Breaking scheduler all jobs
+        scheduler.remove_all_jobs()
+        scheduler.shutdown() if scheduler.running else (lambda: None)()
+    render.render_pool.close()
 
-# Create scheduler
-scheduler = BackgroundScheduler({'apscheduler.executors.default': {
-                                    'class': 'apscheduler.executors.pool:ThreadPoolExecutor',
-                                    'max_workers': se.shared.MAX_SCHEDULER_WORKERS},
-                                 'apscheduler.timezone': pm.now().timezone_name})
-# This variable is needed to indicate whether there was a rescheduling of
-# the persistent job in the scheduler
-setattr(scheduler, 'emergency_mode', False)
-setattr(scheduler, 'is_busy', False)
 
-# Get Slack ``xoxb-*`` OAuth Access Token
-slack_xoxb_access = se.shared.file_vars.pluck('messenger').get('xoxb')
-# Create Slack client
-slack_client = slack.WebClient(token=slack_xoxb_access)
+# The scheduler of the process (see: ``create_scheduler``)
+scheduler: Optional[BackgroundScheduler] = None
+# Leader election of the scheduler (see: ``start_scheduler``)
+leader_election: Optional[LeaderElection] = None
 
 
 if __name__ == '__main__':
+    se.parse_cli_args()
+    server = create_app()
     try:
-        # Read the settings for the crown from the global settings ``keeper``
-        # and create a job in the scheduler with these settings
-        run_every = \
-            se.shared.file_vars.pluck('properties').get('run_every')
-        scheduler.start()
-        scheduler.add_job(scheduler_job_greeting_persistent,
-                          trigger=CronTrigger.from_crontab(run_every),
-                          id='greeting.persistent',
-                          coalesce=True)
-        scheduler.add_listener(
-            scheduler_job_run_monitoring, events.EVENT_JOB_EXECUTED |
-                                          events.EVENT_JOB_SUBMITTED)
+        prepare()
+        start_scheduler()
         # ... and serve Bottle
         se.logger.info(':: Start TCP server ::')
         server.run(host=se.shared.HOST,
@@ -239,9 +452,7 @@ if __name__ == '__main__':
         se.logger.error('KeyboardInterrupt has been caught; wait, cleaning up...')
         sys.exit(os.EX_SOFTWARE)
     finally:
-        # Breaking scheduler all jobs
-        scheduler.remove_all_jobs()
-        scheduler.shutdown() if scheduler.running else (lambda: None)()
+        stop_scheduler()
         # Breaking all sub processes
         se.logger.info(':: Clean everything sub processes ::')
         for child in active_children():
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import builtins
+import threading
+import time
+from os import getpid
+from socket import gethostname
+from typing import Callable, Optional, Sequence
+from uuid import uuid4
+
+import settings as se
+from api.models import DatabaseConnector, LeaseModel
+
+
+"""
+    @author: Jaroslav Kirichok
+    @authors: Delete this text-line if you work with the code below
+              and write your name
+    @license: GNU GENERAL PUBLIC LICENSE 3
+"""
+
+
+__all__: Sequence[str] = ('LeaderElection',)
+
+
+class LeaderElection(builtins.object):
+    """Elects the single process of the service, e.g. to run the scheduler,
+    through the lease lock in the database (see: ``LeaseModel``). The
+    leader renews the lease every third of its time to live; if the
+    leader dies, its lease expires and another process takes it over.
+    """
+
+    holder = property(lambda self: self._holder)  # return str
+    # The process counts itself the leader only until its lease expires,
+    # even if the database is not available to renew it
+    is_leader = property(lambda self: time.monotonic() < self._expires)  # return bool
+
+    def __init__(
+        self, name: str, ttl: int, on_elected: Callable[[], None], on_deposed: Callable[[], None]
+    ) -> None:
+        """Creates leader election.
+
+        Args:
+            name: Lease name, the processes with the same name compete
+            ttl: Time to live of the lease (seconds)
+            on_elected: Called, when the process becomes the leader
+            on_deposed: Called, when the process loses the leadership
+        """
+        self._name = name
+        self._ttl = ttl
+        self._on_elected = on_elected
+        self._on_deposed = on_deposed
+        self._holder = f'{gethostname()}:{getpid()}:{uuid4().hex[:8]}'
+        self._expires = 0.0
+        self._leading = False
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Starts the election in the background thread."""
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name=f'leader-{self._name}', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stops the election and releases the lease, if it is held."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._leading:
+            self._expires = 0.0
+            self._update_leadership()
+            with DatabaseConnector(se.DatabaseEngines.SQLITE) as dbs:
+                if dbs.enter_to_context:
+                    LeaseModel(dbs.session).release(self._name, self._holder)
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._campaign()
+            self._stopped.wait(self._ttl / 3)
+
+    def _campaign(self) -> None:
+        # The lease time is counted from the moment before the request, so
+        # the process never counts itself the leader longer than the lease
+        started = time.monotonic()
+        acquired: Optional[bool] = None
+        with DatabaseConnector(se.DatabaseEngines.SQLITE) as dbs:
+            if dbs.enter_to_context:
+                acquired = LeaseModel(dbs.session).acquire(self._name, self._holder, self._ttl)
+        if acquired is None:
+            se.logger.error(f'Lease {self._name} can not be renewed, the database is not available')
+        elif acquired:
+            self._expires = started + self._ttl
+        else:
+            self._expires = 0.0
+        self._update_leadership()
+
+    def _update_leadership(self) -> None:
+        if self.is_leader and not self._leading:
+            self._leading = True
+            se.logger.info(f'{self._holder} is elected the leader of {self._name}')
+            self._on_elected()
+        elif not self.is_leader and self._leading:
+            self._leading = False
+            se.logger.info(f'{self._holder} is not the leader of {self._name} anymore')
+            self._on_deposed()
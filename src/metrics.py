@@ -0,0 +1,463 @@
+from __future__ import annotations
+
+import bisect
+import builtins
+import contextlib
+import json
+import math
+import threading
+import time
+from os import getpid, makedirs, path, remove, replace, scandir
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+
+"""
+    @author: Jaroslav Kirichok
+    @authors: Delete this text-line if you work with the code below
+              and write your name
+    @license: GNU GENERAL PUBLIC LICENSE 3
+"""
+
+
+__all__: \
+    Sequence[str] = ('CONTENT_TYPE',
+                     'Counter',
+                     'DEFAULT_BUCKETS',
+                     'Gauge',
+                     'Histogram',
+                     'JOB_BUCKETS',
+                     'Registry',
+                     'db_pool_connections',
+                     'db_session_acquire',
+                     'poster_cache_requests',
+                     'registry',
+                     'render_duration',
+                     'render_failures',
+                     'request_latency',
+                     'scheduler_job_duration',
+                     'scheduler_job_lag',
+                     'scheduler_jobs',
+                     'slack_upload_latency',
+                     'slack_uploads')
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+# Latency buckets (seconds) of the fast operations: requests, queries, renders
+DEFAULT_BUCKETS: Tuple[float, ...] = \
+    (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Buckets (seconds) of the scheduler jobs, which run for minutes
+JOB_BUCKETS: Tuple[float, ...] = (0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 600.0, 1800.0)
+
+# Types definitions
+LabelValues = Tuple[str, ...]
+
+
+class Counter(builtins.object):
+    """Monotonic counter, split by the label values."""
+
+    name = property(lambda self: self._name)  # return str
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()) -> None:
+        """Creates counter.
+
+        Args:
+            name: Metric name
+            help: Metric description
+            labels: Label names
+        """
+        self._name = name
+        self._help = help
+        self._labels = tuple(labels)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        """Increments the counter.
+
+        Args:
+            amount: Value to add
+            labels: Label values
+        """
+        key = _label_values(self._labels, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def state(self) -> List[Tuple[LabelValues, float]]:
+        """Returns the values by label values."""
+        with self._lock:
+            return sorted(self._values.items())
+
+    def clear(self) -> None:
+        """Drops all the values."""
+        with self._lock:
+            self._values.clear()
+
+    def exposition(self, states: Sequence[Sequence[Any]] = ()) -> Iterator[str]:
+        """Yields lines of the text exposition format.
+
+        Args:
+            states: Values of the other processes to add (see: ``state``)
+        """
+        yield f'# HELP {self._name} {self._help}'
+        yield f'# TYPE {self._name} counter'
+        values = dict(self.state())
+        for state in states:
+            for key, value in state:
+                values[tuple(key)] = values.get(tuple(key), 0.0) + value
+        for key, value in sorted(values.items()):
+            yield f'{self._name}{_format_labels(self._labels, key)} {_format_value(value)}'
+
+
+class Gauge(builtins.object):
+    """Value, that goes up and down, split by the label values. The gauges
+    of the processes are added up, e.g. the connections of all the pools.
+    """
+
+    name = property(lambda self: self._name)  # return str
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()) -> None:
+        """Creates gauge.
+
+        Args:
+            name: Metric name
+            help: Metric description
+            labels: Label names
+        """
+        self._name = name
+        self._help = help
+        self._labels = tuple(labels)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def set(self, value: float, **labels: str) -> None:
+        """Sets the gauge.
+
+        Args:
+            value: Current value
+            labels: Label values
+        """
+        key = _label_values(self._labels, labels)
+        with self._lock:
+            self._values[key] = value
+
+    def state(self) -> List[Tuple[LabelValues, float]]:
+        """Returns the values by label values."""
+        with self._lock:
+            return sorted(self._values.items())
+
+    def clear(self) -> None:
+        """Drops all the values."""
+        with self._lock:
+            self._values.clear()
+
+    def exposition(self, states: Sequence[Sequence[Any]] = ()) -> Iterator[str]:
+        """Yields lines of the text exposition format.
+
+        Args:
+            states: Values of the other running processes to add (see: ``state``)
+        """
+        yield f'# HELP {self._name} {self._help}'
+        yield f'# TYPE {self._name} gauge'
+        values = dict(self.state())
+        for state in states:
+            for key, value in state:
+                values[tuple(key)] = values.get(tuple(key), 0.0) + value
+        for key, value in sorted(values.items()):
+            yield f'{self._name}{_format_labels(self._labels, key)} {_format_value(value)}'
+
+
+class Histogram(builtins.object):
+    """Histogram of the observed values, split by the label values. Only
+    the bucket of the value is incremented on observe, the buckets are
+    accumulated on exposition.
+    """
+
+    name = property(lambda self: self._name)  # return str
+
+    def __init__(
+        self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> None:
+        """Creates histogram.
+
+        Args:
+            name: Metric name
+            help: Metric description
+            labels: Label names
+            buckets: Upper bounds of the buckets, the +Inf bucket is implied
+        """
+        self._name = name
+        self._help = help
+        self._labels = tuple(labels)
+        self._buckets = tuple(sorted(buckets))
+        # Bucket counts, the values sum and the values count by label values
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        """Observes the value.
+
+        Args:
+            value: Observed value, e.g. duration in seconds
+            labels: Label values
+        """
+        key = _label_values(self._labels, labels)
+        index = bisect.bisect_left(self._buckets, value)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * (len(self._buckets) + 1), [0.0]))
+            counts[index] += 1
+            total[0] += value
+
+    @contextlib.contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observes the duration of the ``with`` block.
+
+        Args:
+            labels: Label values
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def state(self) -> List[Tuple[LabelValues, Tuple[List[int], float]]]:
+        """Returns the bucket counts and the values sum by label values."""
+        with self._lock:
+            return sorted((key, (list(counts), total[0])) for key, (counts, total) in self._values.items())
+
+    def clear(self) -> None:
+        """Drops all the values."""
+        with self._lock:
+            self._values.clear()
+
+    def exposition(self, states: Sequence[Sequence[Any]] = ()) -> Iterator[str]:
+        """Yields lines of the text exposition format.
+
+        Args:
+            states: Values of the other processes to add (see: ``state``)
+        """
+        yield f'# HELP {self._name} {self._help}'
+        yield f'# TYPE {self._name} histogram'
+        values = dict(self.state())
+        for state in states:
+            for key, (counts, total) in state:
+                # The process could run with the other buckets
+                if len(counts) != len(self._buckets) + 1:
+                    continue
+                merged_counts, merged_total = values.get(tuple(key), ([0] * len(counts), 0.0))
+                values[tuple(key)] = ([a + b for a, b in zip(merged_counts, counts)], merged_total + total)
+        for key, (counts, total) in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self._buckets + (math.inf,), counts):
+                cumulative += count
+                labels = _format_labels(self._labels + ('le',), key + (_format_value(bound),))
+                yield f'{self._name}_bucket{labels} {cumulative}'
+            labels = _format_labels(self._labels, key)
+            yield f'{self._name}_sum{labels} {_format_value(total)}'
+            yield f'{self._name}_count{labels} {cumulative}'
+
+
+_Metric = TypeVar('_Metric', Counter, Gauge, Histogram)
+
+
+class Registry(builtins.object):
+    """Registry of the process metrics. Metrics are safe to update from
+    the request threads and the scheduler threads.
+
+    The server runs several worker processes, so the registry can be
+    shared (see: ``share``): every process writes its values to the shared
+    directory, and the exposition adds up the values of all of them.
+    """
+
+    def __init__(self) -> None:
+        """Creates empty registry."""
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+        self._collectors: List[Callable[[], None]] = []
+        self._directory: Optional[str] = None
+        self._file: Optional[str] = None
+        self._interval = 0.0
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        """Registers the counter (see: ``Counter``)."""
+        return self._register(Counter(name, help, labels))
+
+    def histogram(
+        self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        """Registers the histogram (see: ``Histogram``)."""
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def gauge(self, name: str, help: str, labels: Sequence[str] = ()) -> Gauge:
+        """Registers the gauge (see: ``Gauge``)."""
+        return self._register(Gauge(name, help, labels))
+
+    def on_collect(self, collector: Callable[[], None]) -> None:
+        """Adds the function, which sets the gauges, before the metrics are
+        exposed or written to the shared directory.
+
+        Args:
+            collector: Function to call
+        """
+        with self._lock:
+            self._collectors.append(collector)
+
+    def exposition(self) -> str:
+        """Renders all the metrics in the Prometheus text exposition format,
+        with the values of the other processes, if the registry is shared.
+        """
+        self._collect()
+        with self._lock:
+            metrics = list(self._metrics.values())
+        states = self._shared_states()
+        # The gauges of the finished processes are stale, only the processes,
+        # which wrote their values lately, are counted
+        running = time.time() - 3 * self._interval
+        return ''.join(f'{line}\n' for metric in metrics
+                       for line in metric.exposition([state.get(metric.name, ())  # type: ignore
+                                                      for mtime, state in states
+                                                      if not isinstance(metric, Gauge) or mtime >= running]))
+
+    def share(self, directory: str, interval: float) -> None:
+        """Shares the metrics of the process with the other processes. The
+        values, inherited from the parent process, are dropped, and the
+        values of the process are written to the directory every interval.
+
+        Args:
+            directory: Directory, shared by the processes
+            interval: Time between the writes (seconds)
+        """
+        makedirs(directory, exist_ok=True)
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.clear()  # type: ignore
+        # The name is unique, so a new process never takes the values of the
+        # finished one with the same PID
+        self._directory = directory
+        self._file = path.join(directory, f'{getpid()}-{time.time_ns()}.json')
+        self._interval = interval
+
+        def dump_every() -> None:
+            while True:
+                time.sleep(interval)
+                self.dump()
+
+        threading.Thread(target=dump_every, name='metrics-dump', daemon=True).start()
+
+    def dump(self) -> None:
+        """Writes the values of the process to the shared directory."""
+        if self._file is None:
+            return None
+        self._collect()
+        with self._lock:
+            metrics = list(self._metrics.values())
+        state = {metric.name: metric.state() for metric in metrics}  # type: ignore
+        # Write aside and move, so a reader never sees a half-written file
+        try:
+            with open(f'{self._file}.tmp', 'w') as state_file:
+                json.dump(state, state_file)
+            replace(f'{self._file}.tmp', self._file)
+        except OSError:
+            pass
+
+    @staticmethod
+    def discard_shared(directory: str) -> None:
+        """Removes the values of the previous run from the shared directory.
+
+        Args:
+            directory: Directory, shared by the processes
+        """
+        if not path.isdir(directory):
+            return None
+        for entry in scandir(directory):
+            if entry.is_file() and entry.name.endswith(('.json', '.tmp')):
+                try:
+                    remove(entry.path)
+                except OSError:
+                    pass
+
+    def _collect(self) -> None:
+        with self._lock:
+            collectors = list(self._collectors)
+        for collector in collectors:
+            try:
+                collector()
+            except Exception:
+                continue
+
+    def _shared_states(self) -> List[Tuple[float, Dict[str, Any]]]:
+        # The values of the other processes with the time they were written,
+        # the finished processes included, so the counters never go back;
+        # the own values are taken from memory
+        if self._directory is None:
+            return []
+        states = []
+        for entry in scandir(self._directory):
+            if not entry.name.endswith('.json') or entry.path == self._file:
+                continue
+            try:
+                with open(entry.path) as state_file:
+                    states.append((entry.stat().st_mtime, json.load(state_file)))
+            except (OSError, ValueError):
+                continue
+        return states
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f'Metric {metric.name} is already registered')
+            self._metrics[metric.name] = metric
+        return metric
+
+
+def _label_values(names: LabelValues, labels: Dict[str, str]) -> LabelValues:
+    return tuple(str(labels.get(name, '')) for name in names)
+
+
+def _format_labels(names: LabelValues, values: LabelValues) -> str:
+    if not names:
+        return ''
+    escaped = (value.replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n') for value in values)
+    return '{' + ','.join(f'{name}="{value}"' for name, value in zip(names, escaped)) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value))
+
+
+registry = Registry()
+
+# Metrics of the service
+request_latency = \
+    registry.histogram('http_request_duration_seconds', 'Latency of the API requests',
+                       ('endpoint', 'method', 'status'))
+render_duration = \
+    registry.histogram('poster_render_duration_seconds', 'Duration of the poster render by template',
+                       ('template',))
+render_failures = \
+    registry.counter('poster_render_failures_total', 'Failed and timed out poster renders by template',
+                     ('template',))
+poster_cache_requests = \
+    registry.counter('poster_cache_requests_total', 'Poster cache lookups by result', ('result',))
+slack_upload_latency = \
+    registry.histogram('slack_upload_duration_seconds', 'Latency of the single poster upload attempt to Slack',
+                       ('outcome',))
+slack_uploads = \
+    registry.counter('slack_uploads_total', 'Poster upload attempts to Slack by outcome', ('outcome',))
+db_pool_connections = \
+    registry.gauge('db_pool_connections', 'Connections of the database pools by state: '
+                   'size, checked_in, checked_out and overflow', ('engine', 'state'))
+db_session_acquire = \
+    registry.histogram('db_session_acquire_seconds', 'Time to check out a connection and open a session',
+                       ('engine',))
+scheduler_job_duration = \
+    registry.histogram('scheduler_job_duration_seconds', 'Duration of the scheduler jobs',
+                       ('job',), JOB_BUCKETS)
+scheduler_job_lag = \
+    registry.histogram('scheduler_job_lag_seconds', 'Delay of the scheduler job start after its scheduled time',
+                       ('job',), JOB_BUCKETS)
+scheduler_jobs = \
+    registry.counter('scheduler_jobs_total', 'Finished scheduler jobs by outcome', ('job', 'outcome'))
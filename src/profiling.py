@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import builtins
+import contextlib
+import cProfile
+import functools as ft
+import random
+import signal
+import threading
+import tracemalloc
+from os import listdir, path, stat
+from types import FrameType
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Sequence, TypeVar
+
+import helpers
+import settings as se
+
+
+"""
+    @author: Jaroslav Kirichok
+    @authors: Delete this text-line if you work with the code below
+              and write your name
+    @license: GNU GENERAL PUBLIC LICENSE 3
+"""
+
+
+__all__: Sequence[str] = ('Profiler', 'profiler')
+
+# Pendulum names the profiles only, so it is imported on the first profile
+pm = helpers.lazy_import('pendulum')
+
+# Types definitions
+ReturnType = TypeVar('ReturnType')
+
+
+class Profiler(builtins.object):
+    """Opt-in profiler of the scheduler jobs and the API requests. A
+    sampled call is run under cProfile and tracemalloc, and leaves two
+    files in the profiles directory: the pstats file and the report of
+    the top allocations. Only one call is profiled at a time, the calls
+    running meanwhile are not sampled.
+    """
+
+    directory = property(lambda self: self._directory)  # return str
+    enabled = property(lambda self: self._enabled)  # return bool
+
+    def __init__(
+        self, directory: str, enabled: bool, sample_rate: float, top_allocations: int, max_files: int
+    ) -> None:
+        """Creates profiler.
+
+        Args:
+            directory: Directory, the profiles are written to
+            enabled: Profile the calls from the start
+            sample_rate: Share of the calls to profile, from 0 to 1
+            top_allocations: Count of the allocation sites in the report
+            max_files: Count of the profiles to keep, the oldest are removed
+        """
+        self._directory = directory
+        self._enabled = enabled
+        self._sample_rate = sample_rate
+        self._top_allocations = top_allocations
+        self._max_files = max_files
+        self._busy = threading.Lock()
+
+    def configure(self, properties: Mapping[str, Any]) -> None:
+        """Turns the profiling on or off by the settings.
+
+        Args:
+            properties: ``PROFILE`` and ``PROFILE_SAMPLE_RATE`` settings
+        """
+        self._enabled = properties.get('profile', 'off').lower() in ('on', 'yes', 'true', '1')
+        self._sample_rate = float(properties.get('profile_sample_rate', 1.0))
+
+    def toggle(self) -> bool:
+        """Turns the profiling on or off.
+
+        Returns:
+            True, if the profiling is turned on.
+        """
+        self._enabled = not self._enabled
+        se.logger.info(f'Profiling is turned {"on" if self._enabled else "off"}')
+        return self._enabled
+
+    def install_signal(self, signum: Optional[int] = getattr(signal, 'SIGUSR2', None)) -> None:
+        """Toggles the profiling on the signal (``SIGUSR2`` by default).
+        Must be called from the main thread.
+        """
+        if signum is not None:
+            signal.signal(signum, self._on_signal)
+
+    @contextlib.contextmanager
+    def profile(self, name: str) -> Iterator[None]:
+        """Profiles the ``with`` block, if the profiling is on and the
+        block is sampled.
+
+        Args:
+            name: Name of the profiled block, e.g. scheduler job ID
+        """
+        if not self._enabled or random.random() >= self._sample_rate or \
+                not self._busy.acquire(blocking=False):
+            yield
+            return None
+        try:
+            tracemalloc.start()
+            profile = cProfile.Profile()
+            profile.enable()
+            try:
+                yield
+            finally:
+                profile.disable()
+                snapshot = tracemalloc.take_snapshot()
+                tracemalloc.stop()
+                self._save(name, profile, snapshot)
+        finally:
+            self._busy.release()
+
+    def profiled(self, name: str) -> Callable[[Callable[..., ReturnType]], Callable[..., ReturnType]]:
+        """Decorator, which profiles the function calls (see: ``profile``).
+
+        Args:
+            name: Name of the profiled function in the profile file names
+        """
+        def decorator(func: Callable[..., ReturnType]) -> Callable[..., ReturnType]:
+            @ft.wraps(func)
+            def wrapper(*args: Any, **kwargs: Any) -> ReturnType:
+                with self.profile(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def profiles(self) -> List[Dict[str, Any]]:
+        """Returns the captured profiles, the newest first."""
+        if not path.isdir(self._directory):
+            return []
+        profiles = [{'name': file_name,
+                     'size': stat(path.join(self._directory, file_name)).st_size,
+                     'create_on': stat(path.join(self._directory, file_name)).st_mtime}
+                    for file_name in listdir(self._directory)]
+        return sorted(profiles, key=lambda profile: profile['create_on'], reverse=True)
+
+    def _on_signal(self, signum: int, frame: Optional[FrameType]) -> None:
+        self.toggle()
+
+    def _save(self, name: str, profile: cProfile.Profile, snapshot: tracemalloc.Snapshot) -> None:
+        try:
+            helpers.create_folder(self._directory)
+            file_name = path.join(self._directory, f'{pm.now().format("YYYYMMDD-HHmmss-SSSSSS")}-{name}')
+            profile.dump_stats(f'{file_name}.pstats')
+            with open(f'{file_name}.allocations.txt', 'w') as report_file:
+                statistics = snapshot.statistics('lineno')
+                report_file.write(f'Top {self._top_allocations} allocations of {name}; '
+                                  f'total {sum(statistic.size for statistic in statistics) / 1024:.1f} KiB\n')
+                for statistic in statistics[:self._top_allocations]:
+                    report_file.write(f'{statistic}\n')
+            self._prune()
+        except OSError:
+            se.logger.error(f'An error occurred, while saving the profile of {name}', exc_info=True)
+
+    def _prune(self) -> None:
+        # The pstats file and the allocations report are counted separately
+        for profile in self.profiles()[self._max_files * 2:]:
+            helpers.remove_file(path.join(self._directory, profile['name']))
+
+
+# Turned on by the settings in the application factory (see: ``configure``)
+profiler = Profiler(se.shared.PROFILES_DIR,
+                    False,
+                    1.0,
+                    se.shared.PROFILE_TOP_ALLOCATIONS,
+                    se.shared.PROFILE_MAX_FILES)
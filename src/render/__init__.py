@@ -0,0 +1,15 @@
+from .fonts import *
+from .templates import *
+from .plans import *
+from .posters import *
+from .pool import *
+from .artifacts import *
+from .cache import *
+
+
+"""
+    @author: Jaroslav Kirichok
+    @authors: Delete this text-line if you work with the code below
+              and write your name
+    @license: GNU GENERAL PUBLIC LICENSE 3
+"""
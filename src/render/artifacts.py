@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import builtins
+import hashlib
+from os import path, replace
+from typing import Optional, Sequence
+
+import helpers
+import imaging
+
+from .plans import plan_registry
+from .posters import RenderTask
+from .templates import _mtime, template_cache
+
+
+"""
+    @author: Jaroslav Kirichok
+    @authors: Delete this text-line if you work with the code below
+              and write your name
+    @license: GNU GENERAL PUBLIC LICENSE 3
+"""
+
+
+__all__: Sequence[str] = ('ArtifactStore', 'fingerprint')
+
+
+class ArtifactStore(builtins.object):
+    """Store of the built posters on disk. Every poster is stored under the
+    fingerprint of its render inputs (see: ``fingerprint``), so the poster
+    of an employee, who was changed after it was built, is never taken.
+    """
+
+    directory = property(lambda self: self._directory)  # return str
+
+    def __init__(self, directory: str) -> None:
+        """Creates the store over the directory.
+
+        Args:
+            directory: Directory, the posters are stored in
+        """
+        self._directory = directory
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Returns the stored poster.
+
+        Args:
+            key: Fingerprint of the render inputs
+
+        Returns:
+            JPEG encoded poster or None, if it is missing.
+        """
+        try:
+            with open(self._path(key), 'rb') as poster_file:
+                return poster_file.read()
+        except OSError:
+            return None
+
+    def has(self, key: str) -> bool:
+        """Checks that the poster is stored."""
+        return path.isfile(self._path(key))
+
+    def put(self, key: str, poster: bytes) -> None:
+        """Stores the poster.
+
+        Args:
+            key: Fingerprint of the render inputs
+            poster: JPEG encoded poster
+        """
+        helpers.create_folder(self._directory)
+        poster_path = self._path(key)
+        # Write aside and move, so a reader never sees a half-written poster
+        with open(f'{poster_path}.tmp', 'wb') as poster_file:
+            poster_file.write(poster)
+        replace(f'{poster_path}.tmp', poster_path)
+
+    def locate(self, key: str) -> str:
+        """Returns the path to the poster, whether it is stored or not.
+
+        Args:
+            key: Fingerprint of the render inputs
+        """
+        return self._path(key)
+
+    def _path(self, key: str) -> str:
+        return path.join(self._directory, f'{key}.jpg')
+
+
+def fingerprint(task: RenderTask) -> str:
+    """Fingerprint of everything the poster depends on: the employee data,
+    the photo and the template files.
+
+    Args:
+        task: Employee data to render the poster for
+
+    Returns:
+        Hex digest, which changes with any render input.
+    """
+    plan = plan_registry.get(task.poster)
+    inputs = (task.poster,
+              plan.mtime,
+              template_cache.posters_mtime,
+              task.photography,
+              _mtime(task.photography),
+              _mtime(imaging.render_variant_path(task.photography)),
+              task.name,
+              task.years)
+    return hashlib.sha1(repr(inputs).encode()).hexdigest()
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import threading
+import time
+from os import path, scandir, utime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import helpers
+import metrics
+import settings as se
+
+from .artifacts import ArtifactStore, fingerprint
+from .pool import render_pool
+from .posters import RenderTask
+
+
+"""
+    @author: Jaroslav Kirichok
+    @authors: Delete this text-line if you work with the code below
+              and write your name
+    @license: GNU GENERAL PUBLIC LICENSE 3
+"""
+
+
+__all__: Sequence[str] = ('PosterCache', 'poster_cache', 'render_cached')
+
+
+class PosterCache(ArtifactStore):
+    """Content-addressed cache of the built posters over the artifact store:
+    the same employee, template, years count and photo are rendered only
+    once. The least recently used posters are evicted, when the cache is
+    over the size, and the posters are expired after the max age.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, max_age: int) -> None:
+        """Creates the cache over the directory.
+
+        Args:
+            directory: Directory, the posters are stored in
+            max_bytes: Size cap of all the posters (bytes)
+            max_age: Max age of the unused poster (seconds)
+        """
+        super().__init__(directory)
+        self._max_bytes = max_bytes
+        self._max_age = max_age
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Returns the poster and marks it as recently used.
+
+        Args:
+            key: Fingerprint of the render inputs
+
+        Returns:
+            JPEG encoded poster or None, if it is not cached.
+        """
+        poster_path = self._path(key)
+        try:
+            expired = time.time() - path.getmtime(poster_path) > self._max_age
+        except OSError:
+            expired = True
+        poster = None if expired else super().get(key)
+        if poster is None:
+            with self._lock:
+                self._misses += 1
+            metrics.poster_cache_requests.inc(result='miss')
+            return None
+        # The file mtime is the last use time for the eviction
+        try:
+            utime(poster_path)
+        except OSError:
+            pass
+        with self._lock:
+            self._hits += 1
+        metrics.poster_cache_requests.inc(result='hit')
+        return poster
+
+    def evict(self) -> int:
+        """Removes the expired posters, and then the least recently used
+        ones, while the cache is over the size.
+
+        Returns:
+            Removed posters count.
+        """
+        if not path.isdir(self._directory):
+            return 0
+        entries = sorted((entry.stat().st_mtime, entry.stat().st_size, entry.path)
+                         for entry in scandir(self._directory)
+                         if entry.is_file() and entry.name.endswith('.jpg'))
+        total_bytes = sum(size for _, size, _ in entries)
+        expired_before = time.time() - self._max_age
+        removed = 0
+        for mtime, size, poster_path in entries:
+            if mtime >= expired_before and total_bytes <= self._max_bytes:
+                break
+            helpers.remove_file(poster_path)
+            total_bytes -= size
+            removed += 1
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the cache counters of this process."""
+        with self._lock:
+            return {'hits': self._hits, 'misses': self._misses}
+
+
+def render_cached(tasks: Sequence[RenderTask]) -> List[Tuple[str, Optional[bytes]]]:
+    """Renders the greeting posters, taking the built ones from the cache.
+    The same poster requested twice in a batch is rendered once.
+
+    Args:
+        tasks: Employee data to render the posters for
+
+    Returns:
+        Pairs of the cache key and the JPEG encoded poster in the order of
+        tasks, the poster is None for a failed one.
+    """
+    keys = [fingerprint(task) for task in tasks]
+    cached: Dict[str, Optional[bytes]] = {key: poster_cache.get(key) for key in set(keys)}
+    missing = [key for key, poster in cached.items() if poster is None]
+    tasks_by_key = dict(zip(keys, tasks))
+    for key, poster in zip(missing, render_pool.render([tasks_by_key[key] for key in missing])):
+        cached[key] = poster
+        if poster:
+            poster_cache.put(key, poster)
+    poster_cache.evict()
+    return [(key, cached[key]) for key in keys]
+
+
+poster_cache = PosterCache(se.shared.POSTER_CACHE_DIR,
+                           se.shared.POSTER_CACHE_BYTES,
+                           se.shared.POSTER_CACHE_MAX_AGE)
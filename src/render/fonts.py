@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import builtins
+import collections
+import threading
+from os import path
+from typing import Any, Dict, Iterator, Mapping, OrderedDict, Sequence, Tuple
+
+from PIL import ImageFont
+
+import settings as se
+
+
+"""
+    @author: Jaroslav Kirichok
+    @authors: Delete this text-line if you work with the code below
+              and write your name
+    @license: GNU GENERAL PUBLIC LICENSE 3
+"""
+
+
+__all__: Sequence[str] = ('FontRegistry', 'font_registry')
+
+# Types definitions
+FontKey = Tuple[str, int]
+
+
+class FontRegistry(builtins.object):
+    """Process-wide, thread-safe registry of parsed TrueType fonts
+    keyed by (font-family, font-size) with bounded LRU eviction.
+    """
+
+    hits = property(lambda self: self._hits)  # return int
+    misses = property(lambda self: self._misses)  # return int
+
+    def __init__(self, max_size: int) -> None:
+        """Creates empty font registry.
+
+        Args:
+            max_size: Maximum count of fonts kept in the registry
+        """
+        self._fonts: OrderedDict[FontKey, ImageFont.FreeTypeFont] = \
+            collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._max_size = max_size
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, family: str, size: int) -> ImageFont.FreeTypeFont:
+        """Returns a parsed font from the registry, or reads it from the
+        ``FONTS_DIR`` directory on the first call.
+
+        Args:
+            family: Font family, the TTF file name without extension
+            size: Font size
+
+        Returns:
+            Parsed FreeType font object.
+        """
+        key = (family, size)
+        with self._lock:
+            font = self._fonts.get(key)
+            if font is not None:
+                self._fonts.move_to_end(key)
+                self._hits += 1
+                return font
+            self._misses += 1
+        # Parse the font out of the lock, so that other threads are not
+        # waiting for the file reading
+        font = ImageFont.truetype(path.join(se.shared.FONTS_DIR, f'{family}.ttf'),
+                                  size,
+                                  encoding='utf-8')
+        with self._lock:
+            self._fonts[key] = font
+            self._fonts.move_to_end(key)
+            while len(self._fonts) > self._max_size:
+                self._fonts.popitem(last=False)
+        return font
+
+    def warm(self, posters: Mapping[str, Any]) -> None:
+        """Parses all the fonts mentioned in the posters templates.
+
+        Args:
+            posters: Posters templates from the ``posters.json`` file
+        """
+        for item in _text_items(posters):
+            self.get(item['font-family'], item['font-size'])
+
+    def clear(self) -> None:
+        """Drops all the fonts and resets counters."""
+        with self._lock:
+            self._fonts.clear()
+            self._hits = self._misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Returns registry counters."""
+        with self._lock:
+            return {'size': len(self._fonts),
+                    'max_size': self._max_size,
+                    'hits': self._hits,
+                    'misses': self._misses}
+
+
+def _text_items(posters: Mapping[str, Any]) -> Iterator[Dict[str, Any]]:
+    # Walk through the template items tree and yield every text item
+    def traverse(node: Mapping[str, Any]) -> Iterator[Dict[str, Any]]:
+        for value in node.values():
+            if isinstance(value, dict):
+                if 'font-family' in value:
+                    yield value
+                else:
+                    yield from traverse(value)
+
+    for poster in posters.values():
+        yield from traverse(poster.get('items', {}))
+
+
+font_registry = FontRegistry(se.shared.FONT_CACHE_SIZE)
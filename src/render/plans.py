@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import builtins
+import random
+import threading
+from os import path
+from typing import Any, Dict, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+from PIL import Image, ImageColor, ImageDraw, ImageFont
+
+import settings as se
+
+from .fonts import font_registry
+from .templates import _mtime, template_cache
+
+
+"""
+    @author: Jaroslav Kirichok
+    @authors: Delete this text-line if you work with the code below
+              and write your name
+    @license: GNU GENERAL PUBLIC LICENSE 3
+"""
+
+
+__all__: Sequence[str] = ('PlanRegistry',
+                          'RenderPlan',
+                          'TextSlot',
+                          'photography_slot',
+                          'plan_registry')
+
+
+class TextSlot(NamedTuple):
+    """Precomputed anchor of the text on the poster."""
+    font: ImageFont.FreeTypeFont
+    color: Tuple[int, ...]
+    width: int  # poster width to center the text (px)
+    y: int  # text top line from the template (px)
+
+    def draw(self, draw: ImageDraw.ImageDraw, text: str) -> None:
+        """Draws the text horizontally centered on the poster.
+
+        Args:
+            draw: Draw object of the poster image
+            text: Text to draw
+        """
+        draw.text(self._origin(text), text, self.color, font=self.font)
+
+    def box(self, text: str) -> Tuple[int, int, int, int]:
+        """Returns the box, the text is drawn in (see: ``draw``).
+
+        Args:
+            text: Text to draw
+
+        Returns:
+            Left, top, right and bottom bounds of the text (px).
+        """
+        x, y = self._origin(text)
+        left, top, right, bottom = self.font.getbbox(text)
+        return x + left, y + top, x + right, y + bottom
+
+    def _origin(self, text: str) -> Tuple[int, int]:
+        width_font, _ = self.font.getsize(text)
+        _, height_font = self.font.getoffset(text)
+        return (self.width - width_font) // 2, self.y - height_font
+
+
+class RenderPlan(NamedTuple):
+    """Compiled poster template: base layer with the static text already
+    drawn and anchors of the dynamic slots. The static text, that overlaps
+    the photography slot, is drawn over the photography, as the text is
+    always drawn over it.
+    """
+    key: str
+    base: Image.Image
+    mtime: float  # template file mtime, the plan was compiled from
+    width: int
+    photography_size: Tuple[int, int]
+    photography_y: int
+    name: TextSlot
+    years_count: TextSlot
+    years_below: TextSlot
+    overlays: Tuple[Tuple[TextSlot, str], ...] = ()  # static text to draw over the photography
+
+
+class PlanRegistry(builtins.object):
+    """Registry of the render plans compiled from the ``posters.json``
+    file. Plans are recompiled when the posters settings or the template
+    file changes on disk.
+    """
+
+    def __init__(self) -> None:
+        """Creates empty plans registry."""
+        self._plans: Dict[str, RenderPlan] = {}
+        self._lock = threading.Lock()
+        self._posters_mtime: Optional[float] = None
+
+    def keys(self) -> Sequence[str]:
+        """Returns keys of all the posters templates."""
+        template_cache.refresh()
+        return tuple(se.shared.file_vars.pluck('posters').keys())
+
+    def choose(self, seed: str) -> str:
+        """Chooses a poster template by the seed: the same seed chooses the
+        same template, while the set of the templates is the same.
+
+        Args:
+            seed: Seed of the choice, e.g. employee ID and greeting date
+
+        Returns:
+            Poster key in the ``posters.json`` file.
+        """
+        return random.Random(seed).choice(sorted(self.keys()))
+
+    def get(self, key: str) -> RenderPlan:
+        """Returns compiled render plan, compiling it on the first call.
+
+        Args:
+            key: Poster key in the ``posters.json`` file
+
+        Returns:
+            Render plan of the poster.
+        """
+        template_cache.refresh()
+        poster: Mapping[str, Any] = se.shared.file_vars.pluck('posters')[key]
+        template_mtime = _mtime(path.join(se.shared.POSTERS_DIR, poster['image']))
+        with self._lock:
+            if self._posters_mtime != template_cache.posters_mtime:
+                self._posters_mtime = template_cache.posters_mtime
+                self._plans.clear()
+            plan = self._plans.get(key)
+            if plan is None or plan.mtime != template_mtime:
+                plan = self._plans[key] = compile_plan(key, poster, template_mtime)
+        return plan
+
+    def warm(self) -> None:
+        """Compiles render plans of all the posters templates."""
+        for key in self.keys():
+            self.get(key)
+
+    def clear(self) -> None:
+        """Drops all the compiled plans."""
+        with self._lock:
+            self._plans.clear()
+
+
+def compile_plan(key: str, poster: Mapping[str, Any], mtime: float = 0.0) -> RenderPlan:
+    """Compiles a poster template into the render plan.
+
+    Args:
+        key: Poster key in the ``posters.json`` file
+        poster: Poster template settings
+        mtime: Template file mtime
+
+    Returns:
+        Render plan of the poster.
+    """
+    items: Mapping[str, Any] = poster.get('items', {})
+    base = template_cache.get(poster['image'])
+
+    def slot(item: Mapping[str, Any]) -> TextSlot:
+        return TextSlot(font_registry.get(item['font-family'], item['font-size']),
+                        ImageColor.getrgb(item['color']),
+                        base.width,
+                        item['y'])
+
+    # The photography is pasted centered into its slot, at most of the slot size
+    photography_width, photography_height = _photography_size(items.get('photography', {}))
+    photography_y = items.get('photography', {}).get('y', 0)
+    photography_box = ((base.width - photography_width) // 2, photography_y,
+                       (base.width + photography_width) // 2, photography_y + photography_height)
+    # Draw the static text, which is the same for every employee, unless it
+    # can be covered by the photography
+    draw = ImageDraw.Draw(base)
+    overlays = []
+    for caption in ('congratulations', 'summary'):
+        item = items.get(caption, {})
+        text_slot = slot(item)
+        if _overlap(text_slot.box(item.get('text', '')), photography_box):
+            overlays.append((text_slot, item.get('text', '')))
+        else:
+            text_slot.draw(draw, item.get('text', ''))
+    # ... and remember where the dynamic slots are
+    return RenderPlan(key=key,
+                      base=base,
+                      mtime=mtime,
+                      width=base.width,
+                      photography_size=(photography_width, photography_height),
+                      photography_y=photography_y,
+                      name=slot(items.get('name', {})),
+                      years_count=slot(items.get('years', {}).get('count', {})),
+                      years_below=slot(items.get('years', {}).get('below', {})),
+                      overlays=tuple(overlays))
+
+
+def photography_slot() -> Tuple[int, int]:
+    """Returns size of the photography slot, the largest one among the
+    posters templates. Uploaded photos are stored in this size.
+    """
+    sizes = [_photography_size(poster.get('items', {}).get('photography', {}))
+             for poster in se.shared.file_vars.pluck('posters').values()]
+    if not sizes:
+        return se.shared.EMPLOYEE_PHOTO_WIDTH, se.shared.EMPLOYEE_PHOTO_HEIGHT
+    return max(width for width, _ in sizes), max(height for _, height in sizes)
+
+
+def _overlap(box: Tuple[int, int, int, int], other: Tuple[int, int, int, int]) -> bool:
+    left, top, right, bottom = box
+    other_left, other_top, other_right, other_bottom = other
+    return left < other_right and other_left < right and top < other_bottom and other_top < bottom
+
+
+def _photography_size(item: Mapping[str, Any]) -> Tuple[int, int]:
+    return (item.get('width', se.shared.EMPLOYEE_PHOTO_WIDTH),
+            item.get('height', se.shared.EMPLOYEE_PHOTO_HEIGHT))
+
+
+plan_registry = PlanRegistry()
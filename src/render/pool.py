@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import builtins
+import multiprocessing
+import multiprocessing.pool
+import threading
+import time
+from multiprocessing.pool import AsyncResult
+from typing import List, Optional, Sequence, Tuple
+
+import metrics
+import settings as se
+
+from .fonts import font_registry
+from .plans import plan_registry
+from .posters import RenderTask, create_greeting_poster
+
+
+"""
+    @author: Jaroslav Kirichok
+    @authors: Delete this text-line if you work with the code below
+              and write your name
+    @license: GNU GENERAL PUBLIC LICENSE 3
+"""
+
+
+__all__: Sequence[str] = ('RenderPool', 'render_pool')
+
+
+class RenderPool(builtins.object):
+    """Render stage of the daily job. Fans the greeting posters out across
+    the worker processes and collects the results in the order of tasks.
+    The worker processes are kept between the batches, so their fonts,
+    templates and render plans, parsed once at the worker start, are
+    reused by the next runs.
+    """
+
+    def __init__(self, processes: int, max_tasks_per_child: int, timeout: int) -> None:
+        """Creates render stage.
+
+        Args:
+            processes: Count of the worker processes, 1 renders in the
+                       calling thread
+            max_tasks_per_child: Count of renders after which the worker
+                                 process is replaced with a fresh one
+            timeout: Time limit of a single render (seconds)
+        """
+        self._processes = processes
+        self._max_tasks_per_child = max_tasks_per_child
+        self._timeout = timeout
+        self._lock = threading.Lock()
+        self._pool: Optional[multiprocessing.pool.Pool] = None
+        # The service process runs threads (scheduler, leader election,
+        # thumbnails, server), and a lock held by one of them at the fork
+        # would hang the child, so the workers are started from the clean
+        # fork server, or spawned, where it is not available
+        if 'forkserver' in multiprocessing.get_all_start_methods():
+            self._context = multiprocessing.get_context('forkserver')
+            self._context.set_forkserver_preload([__name__])
+        else:
+            self._context = multiprocessing.get_context('spawn')
+
+    def start(self) -> None:
+        """Starts the worker processes in advance, they warm their caches
+        up before the first batch.
+        """
+        if self._processes > 1:
+            self._acquire()
+
+    def close(self) -> None:
+        """Stops the worker processes, the next batch starts new ones."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+    def render(self, tasks: Sequence[RenderTask]) -> List[Optional[bytes]]:
+        """Renders greeting posters.
+
+        Args:
+            tasks: Employees data to render posters for
+
+        Returns:
+            Encoded posters in the order of tasks. The poster that
+            failed or timed out is None.
+        """
+        if self._processes <= 1 or len(tasks) <= 1:
+            return [self._render_inline(task) for task in tasks]
+        pool = self._acquire()
+        results = [pool.apply_async(_timed_render, task) for task in tasks]
+        posters = [self._collect(task, result) for task, result in zip(tasks, results)]
+        # The timed out render still holds its worker, so the pool is
+        # replaced, which kills the hung workers too
+        if not all(result.ready() for result in results):
+            self.close()
+        return posters
+
+    def _acquire(self) -> multiprocessing.pool.Pool:
+        with self._lock:
+            if self._pool is None:
+                self._pool = self._context.Pool(self._processes,
+                                                initializer=_warm_worker,
+                                                maxtasksperchild=self._max_tasks_per_child)
+            return self._pool
+
+    def _collect(self, task: RenderTask, result: AsyncResult) -> Optional[bytes]:
+        # Every render is given its own time: the results ready meanwhile
+        # are taken at once, so a slow render does not eat the time of the
+        # renders after it
+        started = time.monotonic()
+        try:
+            poster, duration = result.get(self._timeout)
+            # The worker processes have their own metrics, so the render
+            # duration is passed back with the poster
+            metrics.render_duration.observe(duration, template=task.poster)
+            return poster or None
+        except multiprocessing.TimeoutError:
+            se.logger.error(
+                f'Render of the poster for {task.name} is timed out after {time.monotonic() - started:.1f}s')
+        except Exception:
+            se.logger.error(f'Render of the poster for {task.name} is failed', exc_info=True)
+        metrics.render_failures.inc(template=task.poster)
+        return None
+
+    @staticmethod
+    def _render_inline(task: RenderTask) -> Optional[bytes]:
+        try:
+            poster, duration = _timed_render(*task)
+            metrics.render_duration.observe(duration, template=task.poster)
+            return poster or None
+        except Exception:
+            se.logger.error(f'Render of the poster for {task.name} is failed', exc_info=True)
+        metrics.render_failures.inc(template=task.poster)
+        return None
+
+
+def _warm_worker() -> None:
+    # Runs in the worker process, when it is started: the fonts and the
+    # render plans are parsed once for all the renders of the worker
+    try:
+        font_registry.warm(se.shared.file_vars.pluck('posters'))
+        plan_registry.warm()
+    except Exception:
+        se.logger.error('Render worker caches are not warmed up', exc_info=True)
+
+
+def _timed_render(*task: object) -> Tuple[bytes, float]:
+    # Runs in the worker process
+    started = time.perf_counter()
+    poster = create_greeting_poster(*task)  # type: ignore
+    return poster, time.perf_counter() - started
+
+
+render_pool = RenderPool(se.shared.RENDER_WORKERS,
+                         se.shared.RENDER_MAX_TASKS_PER_CHILD,
+                         se.shared.RENDER_TIMEOUT)
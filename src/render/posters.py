@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+from io import BytesIO
+from os import path
+from typing import NamedTuple, Sequence, Tuple
+from uuid import uuid4
+
+from PIL import Image, ImageDraw
+
+import helpers
+import imaging
+import settings as se
+
+from .plans import plan_registry
+
+
+"""
+    @author: Jaroslav Kirichok
+    @authors: Delete this text-line if you work with the code below
+              and write your name
+    @license: GNU GENERAL PUBLIC LICENSE 3
+"""
+
+
+__all__: Sequence[str] = ('RenderTask', 'create_greeting_poster')
+
+
+class RenderTask(NamedTuple):
+    """Employee data to render the greeting poster for."""
+    poster: str
+    photography: str
+    name: str
+    years: int
+
+
+def create_greeting_poster(
+    poster: str, photography: str, name: str, years: int
+) -> bytes:
+    """The function creates a greeting poster based on the selected poster
+    and employee data. The static text of the poster is already drawn in
+    its render plan, so only the employee data is drawn here, and the
+    static text, which overlaps the photography slot. The poster
+    is encoded in memory; with ``KEEP_BUILT_POSTERS`` it is also written
+    to the ``BUILT_POSTERS_DIR`` directory for debugging.
+
+    Args:
+        poster: Random selected poster key
+        photography: Path to photography employee
+        name: Name employee
+        years: Years count employee in the company
+
+    Returns:
+        JPEG encoded poster.
+    """
+    plan = plan_registry.get(poster)
+    # Take a copy of the poster base layer
+    poster_im = plan.base.copy()
+    try:
+        # The photography is fitted into the slot of the poster right
+        # while decoding
+        with _open_photography(photography, plan.photography_size) as photography_im:
+            # Get size image for define offset
+            photography_im_width, _ = photography_im.size
+            offset = ((plan.width - photography_im_width) // 2,
+                      plan.photography_y)
+            poster_im.paste(photography_im, offset, photography_im)
+    except BaseException:
+        se.logger.error(
+            'An error occurred, while opening the photography; Continue without photography')
+    # ... and let's go drawing text
+    draw = ImageDraw.Draw(poster_im)
+    plan.name.draw(draw, name)
+    for text_slot, text in plan.overlays:
+        text_slot.draw(draw, text)
+    plan.years_count.draw(draw, str(years))
+    plan.years_below.draw(draw, helpers.time_interpreter(years))
+    # Encode image
+    poster_buffer = BytesIO()
+    poster_im.save(poster_buffer, format='JPEG')
+    # ... and save it, if we need to look at it
+    if se.shared.KEEP_BUILT_POSTERS:
+        helpers.upload_file(path.join(se.shared.BUILT_POSTERS_DIR, f'{uuid4().hex}.jpg'),
+                            poster_buffer.getvalue())
+
+    return poster_buffer.getvalue()
+
+
+def _open_photography(photography: str, size: Tuple[int, int]) -> Image.Image:
+    # Photos uploaded before the render-ready variants appeared are
+    # converted to grayscale on the fly
+    try:
+        return imaging.decode_reduced(imaging.render_variant_path(photography), size)
+    except FileNotFoundError:
+        return imaging.render_variant(imaging.decode_reduced(photography, size))
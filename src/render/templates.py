@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import builtins
+import collections
+import threading
+from os import path, stat
+from typing import Dict, NamedTuple, OrderedDict, Sequence
+
+from PIL import Image
+
+import settings as se
+
+
+"""
+    @author: Jaroslav Kirichok
+    @authors: Delete this text-line if you work with the code below
+              and write your name
+    @license: GNU GENERAL PUBLIC LICENSE 3
+"""
+
+
+__all__: Sequence[str] = ('TemplateCache', 'template_cache')
+
+
+class _Entry(NamedTuple):
+    image: Image.Image
+    mtime: float
+    nbytes: int
+
+
+class TemplateCache(builtins.object):
+    """In-memory cache of the decoded posters templates, keyed by template
+    file name. The entries are invalidated when the template file or the
+    ``posters.json`` file changes on disk.
+    """
+
+    hits = property(lambda self: self._hits)  # return int
+    misses = property(lambda self: self._misses)  # return int
+    posters_mtime = property(lambda self: self._posters_mtime)  # return float
+
+    def __init__(self, max_bytes: int) -> None:
+        """Creates empty templates cache.
+
+        Args:
+            max_bytes: Memory cap of the decoded bitmaps (bytes)
+        """
+        self._entries: OrderedDict[str, _Entry] = collections.OrderedDict()
+        self._lock = threading.RLock()
+        self._max_bytes = max_bytes
+        self._nbytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._posters_json = path.join(se.shared.POSTERS_DIR, 'posters.json')
+        self._posters_mtime = _mtime(self._posters_json)
+
+    def refresh(self) -> bool:
+        """Checks the ``posters.json`` file and, if it was changed on disk,
+        reloads the posters settings and drops all the cached templates.
+
+        Returns:
+            True, if the posters settings were reloaded.
+        """
+        posters_mtime = _mtime(self._posters_json)
+        with self._lock:
+            if posters_mtime == self._posters_mtime:
+                return False
+            self._posters_mtime = posters_mtime
+            self._entries.clear()
+            self._nbytes = 0
+            se.shared.file_vars.load('posters', self._posters_json)
+        se.logger.info('Posters settings were changed; templates cache is dropped')
+        return True
+
+    def get(self, file_name: str) -> Image.Image:
+        """Returns a copy of the decoded template, ready to draw on it.
+
+        Args:
+            file_name: Template file name in the ``POSTERS_DIR`` directory
+
+        Returns:
+            Decoded template bitmap.
+        """
+        return self.peek(file_name).copy()
+
+    def peek(self, file_name: str) -> Image.Image:
+        """Returns the decoded template itself. The result is shared between
+        callers and must not be modified.
+
+        Args:
+            file_name: Template file name in the ``POSTERS_DIR`` directory
+        """
+        self.refresh()
+        file_path = path.join(se.shared.POSTERS_DIR, file_name)
+        file_mtime = _mtime(file_path)
+        with self._lock:
+            entry = self._entries.get(file_name)
+            if entry is not None and entry.mtime == file_mtime:
+                self._entries.move_to_end(file_name)
+                self._hits += 1
+                return entry.image
+            self._misses += 1
+        # Decode out of the lock
+        with Image.open(file_path) as im:
+            im.load()
+            image = im.copy()
+        nbytes = image.width * image.height * len(image.getbands())
+        with self._lock:
+            self._evict(file_name)
+            if nbytes <= self._max_bytes:
+                self._entries[file_name] = _Entry(image, file_mtime, nbytes)
+                self._nbytes += nbytes
+                while self._nbytes > self._max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._nbytes -= evicted.nbytes
+        return image
+
+    def clear(self) -> None:
+        """Drops all the templates and resets counters."""
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+            self._hits = self._misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Returns cache counters."""
+        with self._lock:
+            return {'size': len(self._entries),
+                    'bytes': self._nbytes,
+                    'max_bytes': self._max_bytes,
+                    'hits': self._hits,
+                    'misses': self._misses}
+
+    def _evict(self, file_name: str) -> None:
+        entry = self._entries.pop(file_name, None)
+        if entry is not None:
+            self._nbytes -= entry.nbytes
+
+
+def _mtime(file_path: str) -> float:
+    try:
+        return stat(file_path).st_mtime
+    except OSError:
+        return 0.0
+
+
+template_cache = TemplateCache(se.shared.TEMPLATE_CACHE_BYTES)
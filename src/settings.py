@@ -5,6 +5,7 @@ import configparser
 import json
 import logging
 import sys
+import threading
 from enum import Enum
 from os import path
 from types import MappingProxyType
@@ -14,15 +15,15 @@ from typing import (
     ChainMap,
     Dict,
     Mapping,
+    List,
     Optional,
     Sequence,
+    Tuple,
     TypeVar,
     Union,
     cast,
 )
 
-from pendulum import now
-
 import helpers
 
 
@@ -34,7 +35,15 @@ import helpers
 """
 
 
-__all__: Sequence[str] = ('DatabaseEngines', 'logger', 'shared')
+# Pendulum is imported on the first use, it is not needed to import the service
+pm = helpers.lazy_import('pendulum')
+
+
+__all__: Sequence[str] = ('DatabaseEngines',
+                          'logger',
+                          'parse_cli_args',
+                          'setup_logging',
+                          'shared')
 
 # Types definitions
 SharedType = TypeVar('SharedType')
@@ -95,6 +104,21 @@ class ExtraFileVars(builtins.object):
         """
         self._chain_map: \
             ChainMap[str, Mapping[str, Any]] = collections.ChainMap({'default': {}})
+        # Registered, but not read yet configuration files
+        self._pending: List[Tuple[str, str]] = []
+        self._lock = threading.Lock()
+
+    def register(self, caption: str, file_path: str) -> None:
+        """Registers the configuration file, which is read on the first
+        ``pluck`` (see: ``load``), so the import of the settings does not
+        touch the disk.
+
+        Args:
+            caption: Key name in ChainMap (see: ``self._chain_map``)
+            file_path: Path to the file with configs
+        """
+        with self._lock:
+            self._pending.append((caption, file_path))
 
     def pluck(self, caption: str = '') -> Mapping[str, Any]:
         """Takes a specific node from the "store" by its name/caption. If the
@@ -106,6 +130,8 @@ class ExtraFileVars(builtins.object):
         Returns:
             ``Node`` or ``None`` storage with the read-only permissions.
         """
+        if self._pending:
+            self._load_pending(caption)
         claim_setting_vars = self._chain_map.get(caption)
         if claim_setting_vars is None:
             return MappingProxyType({})
@@ -130,6 +156,14 @@ class ExtraFileVars(builtins.object):
         # ... and call loader function
         suitable_file_loader()
 
+    def _load_pending(self, caption: str) -> None:
+        with self._lock:
+            claimed = [(pending_caption, file_path) for pending_caption, file_path in self._pending
+                       if not caption or pending_caption == caption]
+            for pending in claimed:
+                self._pending.remove(pending)
+                self.load(*pending)
+
     @helpers.disallow
     def properties_file(self, caption: str, file_path: str) -> None:
         """Reads configs from *.properties files of ``extras`` directory.
@@ -179,26 +213,25 @@ class DatabaseEngines(NoValue):
     SQLITE = 'sqlite'
 
 
-parser = argparse.ArgumentParser(add_help=True)
-parser.add_argument('-r', '--release',
-                    action='store_true',
-                    help='run server in release mode')
-cli_args = parser.parse_args()
-
 shared = SharedValues()
 
 # Application manual config
 #
-# Debug or release
-shared.DEBUG = not cli_args.release or False
+# Debug or release (see: ``parse_cli_args``)
+shared.DEBUG = True
 
 # Server vars
 shared.HOST, shared.PORT = '0.0.0.0', 9000
 
+# Keep the built posters in the ``BUILT_POSTERS_DIR`` directory for debugging
+shared.KEEP_BUILT_POSTERS = False
+
 # Path dir vars
 shared.BASE_DIR = path.dirname(path.realpath(__file__))
 shared.EXTRAS_DIR = path.join(shared.BASE_DIR, 'extras')
 shared.LOGS_DIR = path.join(shared.BASE_DIR, 'logs')
+shared.METRICS_DIR = path.join(shared.LOGS_DIR, 'metrics')
+shared.PROFILES_DIR = path.join(shared.LOGS_DIR, 'profiles')
 shared.STATIC_DIR = path.join(shared.BASE_DIR, 'static')
 
 shared.TEMPLATES_DIR = path.join(shared.EXTRAS_DIR, 'templates')
@@ -206,49 +239,119 @@ shared.TEMPLATES_DIR = path.join(shared.EXTRAS_DIR, 'templates')
 shared.FONTS_DIR = path.join(shared.TEMPLATES_DIR, 'fonts')
 shared.POSTERS_DIR = path.join(shared.TEMPLATES_DIR, 'posters')
 shared.BUILT_POSTERS_DIR = path.join(shared.POSTERS_DIR, 'built')
+shared.POSTER_CACHE_DIR = path.join(shared.BUILT_POSTERS_DIR, 'cache')
 
 shared.PHOTOS_DIR = path.join(shared.STATIC_DIR, 'photos')
+shared.THUMBNAILS_DIR = path.join(shared.STATIC_DIR, 'thumbnails')
 
 # Persistent int vars
+shared.DATE_CACHE_SIZE = 4096  # dates count
+shared.DB_BUSY_TIMEOUT = 5  # seconds
+shared.DB_CACHE_BYTES = 16 * 1024 * 1024  # bytes
 shared.DB_CONNECT_TIMEOUT = 10  # seconds
+shared.DB_MMAP_BYTES = 256 * 1024 * 1024  # bytes
+shared.DB_POOL_MAX_OVERFLOW = 10  # connections count
+shared.DB_POOL_RECYCLE = 3600  # seconds
+shared.DB_POOL_SIZE = 5  # connections count
+shared.DB_WRITE_TIMEOUT = 30  # seconds
 shared.EMPLOYEE_PHOTO_HEIGHT = 280  # employee photo height (px)
 shared.EMPLOYEE_PHOTO_WIDTH = 280  # employee photo width (px)
 shared.FETCH_ROWS = 1000  # rows count
+shared.FONT_CACHE_SIZE = 16  # fonts count
+shared.GREETING_SHARDS_SYNC_EVERY = 10  # minutes
+shared.IMPORT_WORKERS = 4  # workers count
+shared.LEADER_LEASE_TTL = 30  # seconds
+shared.MAX_IMAGE_BYTES = 20 * 1024 * 1024  # bytes
+shared.MAX_IMAGE_PIXELS = 4096 * 4096  # pixels count
+shared.MAX_IMPORT_BYTES = 512 * 1024 * 1024  # bytes
 shared.MAX_SCHEDULER_WORKERS = 1  # workers count
+shared.MAX_UPLOAD_BYTES = 10 * 1024 * 1024  # bytes
+shared.METRICS_DUMP_EVERY = 5  # seconds
+shared.POSTER_CACHE_BYTES = 256 * 1024 * 1024  # bytes
+shared.POSTER_CACHE_MAX_AGE = 3 * 24 * 60 * 60  # seconds
+shared.PROFILE_MAX_FILES = 100  # profiles count
+shared.PROFILE_TOP_ALLOCATIONS = 25  # allocation sites count
+shared.RENDER_MAX_TASKS_PER_CHILD = 50  # renders count
+shared.RENDER_TIMEOUT = 60  # seconds
+shared.RENDER_WORKERS = helpers.available_cpus()  # processes count
+shared.SCHEDULER_MISFIRE_GRACE = 60 * 60  # seconds
+shared.SLACK_BACKOFF = 1  # seconds
+shared.SLACK_BACKOFF_MAX = 60  # seconds
+shared.SLACK_CONCURRENCY = 4  # uploads count
+shared.SLACK_MAX_ATTEMPTS = 5  # attempts count
+shared.SLACK_QUEUE_BACKOFF = 10  # minutes
+shared.SLACK_QUEUE_BACKOFF_MAX = 6 * 60  # minutes
+shared.SLACK_QUEUE_CLAIM = 10  # minutes
+shared.SLACK_QUEUE_MAX_ATTEMPTS = 10  # attempts count
+shared.SLACK_TIMEOUT = 30  # seconds
+shared.TEMPLATE_CACHE_BYTES = 64 * 1024 * 1024  # bytes
+shared.THUMBNAIL_HEIGHT = 80  # thumbnail height (px), twice the avatar in the UI
+shared.THUMBNAIL_MAX_AGE = 365 * 24 * 60 * 60  # seconds
+shared.THUMBNAIL_SWEEP_EVERY = 10  # minutes
+shared.THUMBNAIL_WIDTH = 80  # thumbnail width (px), twice the avatar in the UI
+shared.THUMBNAIL_WORKERS = 1  # workers count
+shared.UPLOAD_CHUNK_BYTES = 64 * 1024  # bytes
 
 
 shared.file_vars = ExtraFileVars()
-# Load information from the *.properties file
-shared.file_vars.load('properties',
-                      path.join(shared.EXTRAS_DIR, 'default.properties'))
+# Register the *.properties file
+shared.file_vars.register('properties',
+                          path.join(shared.EXTRAS_DIR, 'default.properties'))
+
+# Register the *.properties file
+shared.file_vars.register('messenger',
+                          path.join(shared.EXTRAS_DIR, 'messenger.properties'))
 
-# Load information from the *.properties file
-shared.file_vars.load('messenger',
-                      path.join(shared.EXTRAS_DIR, 'messenger.properties'))
+# Register the *.json file
+shared.file_vars.register('posters',
+                          path.join(shared.POSTERS_DIR, 'posters.json'))
 
-# Load information from the *.properties file
-shared.file_vars.load('posters',
-                      path.join(shared.POSTERS_DIR, 'posters.json'))
 
+logger = logging.getLogger()
 
-# Logger create and configuration
-try:
-    for claim_folder in (shared.LOGS_DIR,):
-        helpers.create_folder(claim_folder)
-except OSError as exc:
-    sys.stderr.write(f'{exc.strerror} logs')
 
-formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-try:
-    logging.basicConfig(filename=path.join(shared.LOGS_DIR, f'{now().to_cookie_string()}.log'),
-                        level=logging.DEBUG)
-except FileNotFoundError:
-    logging.basicConfig(filename=path.join(shared.BASE_DIR, f'{now().to_cookie_string()}.log'),
-                        level=logging.DEBUG)
+def parse_cli_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    """Parses the command line arguments of the server. Other arguments
+    belong to the command line tools (see: importer.py).
 
-handler = logging.StreamHandler()
-handler.setFormatter(formatter)
+    Args:
+        argv: Command line arguments, ``sys.argv`` by default
 
-logger = logging.getLogger()
-logger.setLevel(logging.DEBUG)
-logger.addHandler(handler)
+    Returns:
+        Parsed arguments.
+    """
+    parser = argparse.ArgumentParser(add_help=True)
+    parser.add_argument('-r', '--release',
+                        action='store_true',
+                        help='run server in release mode')
+    cli_args, _ = parser.parse_known_args(argv)
+    shared.DEBUG = not cli_args.release
+    return cli_args
+
+
+def setup_logging() -> None:
+    """Logger create and configuration: the log file of the run and
+    the console. Called once by the entry points, the repeated calls
+    do nothing.
+    """
+    if logger.handlers:
+        return None
+    try:
+        for claim_folder in (shared.LOGS_DIR,):
+            helpers.create_folder(claim_folder)
+    except OSError as exc:
+        sys.stderr.write(f'{exc.strerror} logs')
+
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    try:
+        logging.basicConfig(filename=path.join(shared.LOGS_DIR, f'{pm.now().to_cookie_string()}.log'),
+                            level=logging.DEBUG)
+    except FileNotFoundError:
+        logging.basicConfig(filename=path.join(shared.BASE_DIR, f'{pm.now().to_cookie_string()}.log'),
+                            level=logging.DEBUG)
+
+    handler = logging.StreamHandler()
+    handler.setFormatter(formatter)
+
+    logger.setLevel(logging.DEBUG)
+    logger.addHandler(handler)
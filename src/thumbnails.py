@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import builtins
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+
+import helpers
+import settings as se
+from api.models import DatabaseConnector, EmployeeModel
+
+
+"""
+    @author: Jaroslav Kirichok
+    @authors: Delete this text-line if you work with the code below
+              and write your name
+    @license: GNU GENERAL PUBLIC LICENSE 3
+"""
+
+
+__all__: Sequence[str] = ('Thumbnailer', 'thumbnailer')
+
+# Pillow is imported, when the first thumbnail is made
+imaging = helpers.lazy_import('imaging')
+
+
+class Thumbnailer(builtins.object):
+    """Makes the list thumbnails of the employee photos in the background
+    (see: ``imaging.save_thumbnails``), and records their digest in the
+    employee row. The thumbnails of the photo are made once, the photos
+    missed by the request threads are picked up by ``process_missing``.
+    """
+
+    directory = property(lambda self: self._directory)  # return str
+
+    def __init__(self, directory: str, size: Tuple[int, int], workers: int) -> None:
+        """Creates thumbnailer.
+
+        Args:
+            directory: Directory, the thumbnails are saved to
+            size: Max size of the thumbnails
+            workers: Count of the background threads
+        """
+        self._directory = directory
+        self._size = size
+        # Threads are started on the first photo
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='thumbnails')
+        self._sweep: Optional[Future] = None
+
+    def submit(self, employee_id: int, photography: str) -> Future:
+        """Makes the thumbnails of the employee photo in the background.
+
+        Args:
+            employee_id: Employee ID
+            photography: Photo path relative to the service directory
+        """
+        return self._executor.submit(self.make, employee_id, photography)
+
+    def make(self, employee_id: int, photography: str) -> Optional[str]:
+        """Makes the thumbnails of the employee photo.
+
+        Args:
+            employee_id: Employee ID
+            photography: Photo path relative to the service directory
+
+        Returns:
+            Digest of the thumbnails, or None if the database is not available.
+        """
+        try:
+            helpers.create_folder(self._directory)
+            digest = imaging.save_thumbnails(f'{se.shared.BASE_DIR}{photography}', self._directory, self._size)
+        except (OSError, ValueError):
+            se.logger.error(f'Thumbnails of the employee {employee_id} photo are not made', exc_info=True)
+            # The empty digest keeps the broken photo from the next attempts
+            digest = ''
+        with DatabaseConnector(se.DatabaseEngines.SQLITE) as dbs:
+            if dbs.enter_to_context:
+                EmployeeModel(dbs.session).set_photo_digest(employee_id, digest)
+                return digest
+        return None
+
+    def sweep(self) -> None:
+        """Runs ``process_missing`` in the background, so the sweep of the
+        bulk imported photos never holds the scheduler workers. The sweep
+        is skipped, while the previous one is running.
+        """
+        if self._sweep is not None and not self._sweep.done():
+            se.logger.warning('Thumbnails sweep is skipped, the previous one is not finished yet')
+            return None
+        self._sweep = self._executor.submit(self.process_missing)
+
+    def process_missing(self) -> int:
+        """Makes the thumbnails of the photos, which have not them yet, e.g.
+        uploaded before the thumbnails or imported in bulk.
+
+        Returns:
+            Count of the photos processed.
+        """
+        processed = 0
+        last_id = 0
+        while True:
+            employees: List[Tuple[int, str]] = []
+            with DatabaseConnector(se.DatabaseEngines.SQLITE, readonly=True) as dbs:
+                if dbs.enter_to_context:
+                    employees = [(employee.id, employee.photography) for employee in
+                                 EmployeeModel(dbs.session).get_without_thumbnails(last_id, se.shared.FETCH_ROWS)]
+            if not employees:
+                break
+            for employee_id, photography in employees:
+                self.make(employee_id, photography)
+            processed += len(employees)
+            last_id, _ = employees[-1]
+        return processed
+
+
+thumbnailer = Thumbnailer(se.shared.THUMBNAILS_DIR,
+                          (se.shared.THUMBNAIL_WIDTH, se.shared.THUMBNAIL_HEIGHT),
+                          se.shared.THUMBNAIL_WORKERS)
@@ -12,10 +12,25 @@ export const getList = async () => {
   return await response.json()
 }
 
+const toFormData = user => {
+  const formData = new FormData()
+
+  Object.entries(user).forEach(([key, value]) => {
+    if (value instanceof Blob) {
+      formData.append(key, value, `${key}.${value.type.split('/').pop()}`)
+    } else {
+      formData.append(key, value)
+    }
+  })
+  return formData
+}
+
 export const addUser = async user => {
+  // The cropped photo is sent as a binary file, the browser sets
+  // the multipart boundary itself
   const response = await fetch(`${baseURL}${apiUrl}${config.ADD_MEMBER}`, {
     method: 'POST',
-    body: JSON.stringify(user)
+    body: user.photography instanceof Blob ? toFormData(user) : JSON.stringify(user)
   })
 
   if(response.status !== 200) throw new Error(response)